@@ -0,0 +1,159 @@
+##### bench_greathost.py 性能对比脚本 ######
+# python bench_greathost.py proxy [--url URL] [-n 5] [--modes wire,native] [--proxy URL]
+#   对比 selenium-wire 中间人代理和 Chrome 原生代理的页面加载耗时、CPU 时间和内存
+# python bench_greathost.py block [--url URL] [-n 5] [--proxy URL]
+#   对比开/关资源拦截时的请求数、下载字节和加载耗时
+# python bench_greathost.py flow [--runs 5] [--scripts api,dom,dom-fast] [--fake-args "--latency 80 --cooldown 10"]
+#   起一个本地 fake_greathost.py，端到端跑 greathost.py (API 流程) 和 greathost备份.py (DOM 流程，dom-fast 为 FAST_MODE=1)，
+#   统计 p50/p95 耗时和进程树峰值内存，全程不访问外网
+
+import argparse, os, shlex, statistics, subprocess, sys, tempfile, time
+import requests
+import greathost as gh
+import gh_block
+import fake_greathost
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS = {"api": "greathost.py", "dom": "greathost备份.py", "dom-fast": "greathost备份.py"}
+SCRIPT_ENV = {"api": {"STRATEGIES": "api"}, "dom-fast": {"FAST_MODE": "1"}} # api 只量接口流程，不让失败时退到 dom 把数字搅混
+
+def pct(values, p):
+    if not values: return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+def bench_proxy(args):
+    if not args.proxy: print("⚠️ 未设置 --proxy / PROXY_URL / PROXY_URLS，两种模式都会直连，对比没有意义")
+    rows = []
+    for mode in args.modes.split(","):
+        gh.PROXY_MODE = mode
+        cpu0, t = gh.tree_cpu_s(), time.perf_counter()
+        d = gh.new_chrome(args.proxy)
+        start = time.perf_counter() - t
+        loads, peak = [], gh.tree_rss_mb()
+        try:
+            d.set_page_load_timeout(60)
+            for _ in range(args.n):
+                d.delete_all_cookies()
+                t = time.perf_counter()
+                d.get(args.url)
+                loads.append((time.perf_counter() - t) * 1000)
+                peak = max(peak, gh.tree_rss_mb())
+            cpu = gh.tree_cpu_s() - cpu0 # 退出前采样，否则 chrome 子进程的 CPU 时间就丢了
+        finally:
+            d.quit()
+        rows.append((mode, start, statistics.median(loads), pct(loads, 95), cpu, peak))
+        print(f"✅ {mode}: 完成 {args.n} 次加载")
+
+    print(f"\n🌐 {args.url} x{args.n}")
+    print(f"{'mode':<8}{'启动(s)':>10}{'p50(ms)':>10}{'p95(ms)':>10}{'CPU(s)':>10}{'峰值RSS(MB)':>14}")
+    for mode, start, p50, p95, cpu, peak in rows:
+        print(f"{mode:<8}{start:>10.2f}{p50:>10.0f}{p95:>10.0f}{cpu:>10.2f}{peak:>14.0f}")
+
+def bench_block(args):
+    rows = []
+    types, hosts = gh_block.BLOCK_TYPES, gh_block.BLOCK_HOSTS
+    for label, on in (("off", False), ("on", True)):
+        # 关闭时清空规则但保留 performance 日志，两边用同一套统计口径
+        gh_block.BLOCK_RESOURCES = True
+        gh_block.BLOCK_TYPES, gh_block.BLOCK_HOSTS = (types, hosts) if on else ("", "")
+        d = gh.new_chrome(args.proxy)
+        loads, reqs, size, blocked = [], 0, 0, 0
+        try:
+            d.set_page_load_timeout(60)
+            for _ in range(args.n):
+                d.execute_cdp_cmd("Network.clearBrowserCache", {})
+                t = time.perf_counter()
+                d.get(args.url)
+                loads.append((time.perf_counter() - t) * 1000)
+                rep = gh_block.block_report(d) or {}
+                reqs += rep.get("requests", 0); size += rep.get("bytes", 0); blocked += rep.get("blocked", 0)
+        finally:
+            d.quit()
+        rows.append((label, statistics.median(loads), reqs / args.n, blocked / args.n, size / args.n / 1024))
+
+    print(f"\n🧱 {args.url} x{args.n} (每次清缓存)")
+    print(f"{'拦截':<6}{'p50(ms)':>10}{'请求/次':>10}{'拦下/次':>10}{'KB/次':>10}")
+    for label, p50, reqs, blocked, kb in rows:
+        print(f"{label:<6}{p50:>10.0f}{reqs:>10.1f}{blocked:>10.1f}{kb:>10.0f}")
+    (_, _, r0, _, k0), (_, _, r1, _, k1) = rows
+    print(f"💰 每次加载节省 {r0 - r1:.1f} 个请求 / {k0 - k1:.0f} KB ({(k0 - k1) / k0 * 100 if k0 else 0:.0f}%)")
+
+def run_once(script, url, fa, work, session_file, extra=None):
+    env = dict(os.environ,
+               GH_BASE_URL=url, IP_CHECK_URL=f"{url}/ip", PROXY_URL="", PROXY_URLS="",
+               GREATHOST_EMAIL=fa.email, GREATHOST_PASSWORD=fa.password, TARGET_NAME=fa.name,
+               TELEGRAM_BOT_TOKEN="", TELEGRAM_CHAT_ID="", START_DELAY="0",
+               SESSION_FILE=session_file, METRICS_FILE=os.path.join(work, "metrics.jsonl"))
+    env.update(extra or {})
+    with open(os.path.join(work, "run.log"), "w", encoding="utf-8") as log:
+        t = time.perf_counter()
+        p = subprocess.Popen([sys.executable, os.path.join(HERE, script)], cwd=work, env=env, stdout=log, stderr=subprocess.STDOUT)
+        peak = 0.0
+        while p.poll() is None:
+            peak = max(peak, gh.tree_rss_mb(p.pid))
+            time.sleep(0.1)
+        wall = time.perf_counter() - t
+    try:
+        with open(os.path.join(work, "README.md"), encoding="utf-8") as f:
+            outcome = next(l for l in f.read().splitlines()[1:] if l.strip()).strip("* ")
+    except Exception:
+        outcome = f"无 README (exit {p.returncode})"
+    return wall, peak, outcome
+
+def bench_flow(args):
+    fa = fake_greathost.build_parser().parse_args(shlex.split(args.fake_args))
+    fa.port = 0
+    server, url = fake_greathost.start(fa)
+    print(f"🧪 Fake GreatHost: {url} ({args.fake_args or '默认参数'})")
+    root = tempfile.mkdtemp(prefix="gh-bench-")
+    rows = []
+    try:
+        for key in args.scripts.split(","):
+            walls, peaks, outcomes = [], [], {}
+            session_file = os.path.join(root, f"{key}-session.json")
+            for i in range(args.runs):
+                if not args.keep_state: requests.post(f"{url}/__reset", timeout=5)
+                work = os.path.join(root, f"{key}-{i + 1}")
+                os.makedirs(work)
+                sf = session_file if args.keep_session else os.path.join(work, "session.json")
+                wall, peak, outcome = run_once(SCRIPTS[key], url, fa, work, sf, SCRIPT_ENV.get(key))
+                walls.append(wall); peaks.append(peak)
+                outcomes[outcome] = outcomes.get(outcome, 0) + 1
+                print(f"  {key} #{i + 1}: {wall:.2f}s | {peak:.0f}MB | {outcome}")
+            rows.append((key, walls, peaks, outcomes))
+    finally:
+        server.shutdown()
+
+    print(f"\n🏁 端到端 x{args.runs} (日志: {root})")
+    print(f"{'flow':<10}{'p50(s)':>9}{'p95(s)':>9}{'RSS p50(MB)':>13}{'RSS p95(MB)':>13}  结果")
+    for key, walls, peaks, outcomes in rows:
+        res = ", ".join(f"{k} x{v}" for k, v in outcomes.items())
+        print(f"{key:<10}{pct(walls, 50):>9.2f}{pct(walls, 95):>9.2f}{pct(peaks, 50):>13.0f}{pct(peaks, 95):>13.0f}  {res}")
+
+def main():
+    ap = argparse.ArgumentParser(description="GreatHost 续期脚本性能对比")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("proxy", help="对比代理模式")
+    p.add_argument("--url", default=f"{gh.BASE_URL}/login")
+    p.add_argument("-n", type=int, default=5)
+    p.add_argument("--proxy", default=(gh.POOL.urls or [""])[0], help="默认取 PROXY_URLS/PROXY_URL 的第一个")
+    p.add_argument("--modes", default="wire,native")
+    p.set_defaults(func=bench_proxy)
+    p = sub.add_parser("block", help="对比资源拦截")
+    p.add_argument("--url", default=f"{gh.BASE_URL}/login")
+    p.add_argument("-n", type=int, default=5)
+    p.add_argument("--proxy", default=(gh.POOL.urls or [""])[0], help="默认取 PROXY_URLS/PROXY_URL 的第一个")
+    p.set_defaults(func=bench_block)
+    p = sub.add_parser("flow", help="离线端到端压测 (本地 fake 服务器)")
+    p.add_argument("--runs", type=int, default=5)
+    p.add_argument("--scripts", default="api,dom,dom-fast")
+    p.add_argument("--fake-args", default="", help="透传给 fake_greathost.py 的参数")
+    p.add_argument("--keep-session", action="store_true", help="多次运行共用会话缓存 (测缓存命中)")
+    p.add_argument("--keep-state", action="store_true", help="不在每次运行前重置 fake 服务器状态")
+    p.set_defaults(func=bench_flow)
+    args = ap.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
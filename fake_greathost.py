@@ -0,0 +1,265 @@
+##### fake_greathost.py 本地 GreatHost 替身 (离线测试/压测用) ######
+# python fake_greathost.py --port 8765 --latency 80 --hours 50 --cooldown 0
+# 然后: GH_BASE_URL=http://127.0.0.1:8765 IP_CHECK_URL=http://127.0.0.1:8765/ip python greathost.py
+# 实现 /login /dashboard /billing /contracts/{id} 以及 greathost.py 用到的全部 /api 接口，
+# 支持延迟、冷却、上限、错误注入、登录页 JS 验证 (--challenge)，状态只保存在内存里。
+
+import argparse, json, random, re, secrets, threading, time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+CAP_TEXT = "No puedes renovar más de 5 días"
+
+def iso(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+class FakeState:
+    def __init__(self, args):
+        self.args = args
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        a, now = self.args, time.time()
+        with self.lock:
+            self.sessions, self.tokens, self.clearances = set(), set(), set()
+            self.hits = {}
+            self.servers = {}
+            for i in range(a.servers):
+                sid = f"srv-{i + 1:04d}"
+                self.servers[sid] = {
+                    "id": sid, "name": a.name if i == 0 else f"{a.name}-{i + 1}",
+                    "status": a.status, "expiry": now + a.hours * 3600,
+                    "cooldown_until": now + a.cooldown * 60,
+                }
+
+    def hours_left(self, srv):
+        return max(0, int((srv["expiry"] - time.time()) / 3600))
+
+    def wait_minutes(self, srv):
+        return max(0, -(-int(srv["cooldown_until"] - time.time()) // 60))
+
+    def renewal_info(self, srv):
+        # 和真实接口一样只给到期时间，冷却要 POST 了才知道
+        return {"nextRenewalDate": iso(srv["expiry"])}
+
+    def renew(self, srv):
+        a = self.args
+        with self.lock:
+            if self.wait_minutes(srv): return {"success": False, "message": f"Wait {self.wait_minutes(srv)} minutes"}
+            if self.hours_left(srv) + a.gain > a.cap: return {"success": False, "message": CAP_TEXT}
+            srv["expiry"] = max(srv["expiry"], time.time()) + a.gain * 3600
+            srv["cooldown_until"] = time.time() + a.renew_cooldown * 60
+            return {"success": True, "message": f"Server renewed for {a.gain} hours", "details": {"nextRenewalDate": iso(srv["expiry"])}}
+
+PAGE = """<!doctype html><html><head><meta charset="utf-8"><title>{title}</title>
+<link rel="stylesheet" href="/static/app.css"><link rel="icon" href="/static/logo.png"></head>
+<body><img src="/static/logo.png" alt="logo">{body}</body></html>"""
+
+class Handler(BaseHTTPRequestHandler):
+    server_version = "FakeGreatHost/1.0"
+
+    def log_message(self, fmt, *args):
+        if self.server.state.args.verbose: super().log_message(fmt, *args)
+
+    # ---- helpers ----
+    def delay(self):
+        a = self.server.state.args
+        if a.latency: time.sleep(max(0, random.gauss(a.latency, a.jitter)) / 1000)
+
+    def cookie(self, name):
+        for part in (self.headers.get("Cookie") or "").split(";"):
+            k, _, v = part.strip().partition("=")
+            if k == name: return v
+        return None
+
+    def session(self):
+        v = self.cookie("greathost_session")
+        return v if v in self.server.state.sessions else None
+
+    def challenge(self):
+        # 模拟 Cloudflare 的 JS 验证：执行脚本写入 cf_clearance 再刷新，纯 HTTP 客户端过不去
+        st = self.server.state
+        if not st.args.challenge or self.cookie("cf_clearance") in st.clearances: return False
+        token = secrets.token_hex(16)
+        with st.lock: st.clearances.add(token)
+        self.send(403, f"""<!doctype html><html><head><title>Just a moment...</title></head>
+<body><div id="challenge-platform">Checking your browser before accessing the site.</div>
+<script>setTimeout(() => {{ document.cookie = "cf_clearance={token}; path=/"; location.reload(); }}, 200);</script></body></html>""")
+        return True
+
+    def send(self, code, body, ctype="text/html; charset=utf-8", headers=()):
+        data = body.encode() if isinstance(body, str) else body
+        self.send_response(code)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in headers: self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def json(self, obj, code=200):
+        self.send(code, json.dumps(obj), "application/json")
+
+    def redirect(self, to, headers=()):
+        self.send(302, "", headers=[("Location", to)] + list(headers))
+
+    def inject_error(self, path):
+        a = self.server.state.args
+        if a.error_rate and re.search(a.error_paths, path) and random.random() < a.error_rate:
+            self.json({"success": False, "message": "Injected server error"}, 500)
+            return True
+        return False
+
+    def page(self, title, body):
+        self.send(200, PAGE.format(title=title, body=body))
+
+    # ---- routes ----
+    def do_GET(self):
+        self.route("GET")
+
+    def do_POST(self):
+        self.route("POST")
+
+    def route(self, method):
+        st = self.server.state
+        path = urlparse(self.path).path
+        with st.lock: st.hits[f"{method} {path}"] = st.hits.get(f"{method} {path}", 0) + 1
+        self.delay()
+        if self.inject_error(path): return
+
+        if path.startswith("/static/"):
+            return self.send(200, b"\x00" * st.args.asset_kb * 1024, "application/octet-stream")
+        if path == "/ip":
+            return self.json({"ip": self.client_address[0]})
+        if path == "/login":
+            if self.challenge(): return
+            return self.login_post() if method == "POST" else self.login_page()
+        if path == "/__reset" and method == "POST":
+            st.reset(); return self.json({"success": True})
+        if path == "/__stats":
+            with st.lock: return self.json({"hits": st.hits})
+
+        sess = self.session()
+        if path.startswith("/api/"):
+            if not sess: return self.json({"message": "Unauthenticated."}, 401)
+            return self.api(method, path)
+        if not sess: return self.redirect("/login")
+
+        if path in ("/dashboard", "/services"):
+            rows = "".join(
+                f'<div class="server"><span class="server-name">{s["name"]}</span>'
+                f'<span class="server-status-indicator" title="{s["status"].capitalize()}"></span>'
+                f'<button class="btn-billing-compact" onclick="location.href=\'/billing/{s["id"]}\'">Billing</button>'
+                + (f'<button class="btn-start" onclick="fetch(\'/api/servers/{s["id"]}/start\',{{method:\'POST\'}})">Start</button>' if s["status"] != "running" else "")
+                + "</div>" for s in st.servers.values())
+            return self.page("Dashboard", f"<h1>Dashboard</h1>{rows}")
+        m = re.fullmatch(r"/billing/([\w-]+)", path)
+        if m and m.group(1) in st.servers:
+            return self.page("Billing", f'<a href="/details/{m.group(1)}">View Details</a>')
+        m = re.fullmatch(r"/(?:contracts|details)/([\w-]+)", path)
+        if m and m.group(1) in st.servers:
+            return self.contract_page(st.servers[m.group(1)])
+        self.send(404, "not found")
+
+    def login_page(self):
+        st = self.server.state
+        token = secrets.token_hex(16)
+        with st.lock: st.tokens.add(token)
+        self.page("Login", f"""<form method="post" action="/login">
+<input type="hidden" name="_token" value="{token}">
+<input type="email" name="email"><input type="password" name="password">
+<button type="submit">Login</button></form>""")
+
+    def login_post(self):
+        st, a = self.server.state, self.server.state.args
+        n = int(self.headers.get("Content-Length") or 0)
+        form = {k: v[0] for k, v in parse_qs(self.rfile.read(n).decode()).items()}
+        with st.lock: token_ok = form.get("_token") in st.tokens
+        if not token_ok: return self.send(419, "Page Expired")
+        if form.get("email") != a.email or form.get("password") != a.password:
+            return self.redirect("/login?error=1")
+        sess = secrets.token_hex(16)
+        with st.lock: st.sessions.add(sess)
+        self.redirect("/dashboard", [("Set-Cookie", f"greathost_session={sess}; Path=/; HttpOnly; Max-Age={a.session_ttl}")])
+
+    def contract_page(self, srv):
+        st = self.server.state
+        data = {"hours": st.hours_left(srv), "wait": st.wait_minutes(srv)}
+        # 模拟前端异步渲染：数值和按钮文字延迟写入
+        self.page("Contract", f"""<h1>Contract {srv['id']}</h1>
+<p>Accumulated: <span id="accumulated-time"></span></p>
+<button id="renew-free-server-btn"></button><div id="renew-msg"></div>
+<script>
+const S = {json.dumps(data)};
+const paint = () => {{
+  document.getElementById('accumulated-time').textContent = S.hours + ' hours';
+  document.getElementById('renew-free-server-btn').textContent = S.wait > 0 ? `Wait ${{S.wait}} minutes` : 'Renew Free';
+}};
+setTimeout(paint, {st.args.render_delay});
+document.getElementById('renew-free-server-btn').onclick = async () => {{
+  const r = await fetch('/api/renewal/contracts/{srv['id']}/renew-free', {{method: 'POST'}});
+  const d = await r.json();
+  if (d.success) {{ S.hours = Math.floor((Date.parse(d.details.nextRenewalDate) - Date.now()) / 3600000); S.wait = {st.args.renew_cooldown}; }}
+  else document.getElementById('renew-msg').textContent = d.message;
+  paint();
+}};
+</script>""")
+
+    def api(self, method, path):
+        st = self.server.state
+        if path == "/api/servers" and method == "GET":
+            return self.json({"servers": [{"id": s["id"], "name": s["name"]} for s in st.servers.values()]})
+        m = re.fullmatch(r"/api/servers/([\w-]+)/(information|start)", path)
+        if m and m.group(1) in st.servers:
+            srv = st.servers[m.group(1)]
+            if m.group(2) == "start" and method == "POST":
+                srv["status"] = "running"; return self.json({"success": True})
+            return self.json({"id": srv["id"], "name": srv["name"], "status": srv["status"]})
+        m = re.fullmatch(r"/api/renewal/contracts/([\w-]+)(/renew-free)?", path)
+        if m and m.group(1) in st.servers:
+            srv = st.servers[m.group(1)]
+            if m.group(2) and method == "POST": return self.json(st.renew(srv))
+            if not m.group(2): return self.json({"contract": {"id": srv["id"], "renewalInfo": st.renewal_info(srv)}})
+        self.json({"success": False, "message": "Not found"}, 404)
+
+def build_parser():
+    ap = argparse.ArgumentParser(description="本地 GreatHost 替身服务器")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--email", default="bench@example.com")
+    ap.add_argument("--password", default="bench-pass")
+    ap.add_argument("--name", default="666", help="第一台服务器名，其余为 name-2, name-3 ...")
+    ap.add_argument("--servers", type=int, default=1)
+    ap.add_argument("--status", default="running")
+    ap.add_argument("--hours", type=float, default=50, help="初始剩余小时")
+    ap.add_argument("--cooldown", type=float, default=0, help="初始剩余冷却分钟")
+    ap.add_argument("--renew-cooldown", type=float, default=30, help="续期后冷却分钟")
+    ap.add_argument("--gain", type=float, default=12, help="每次续期增加小时")
+    ap.add_argument("--cap", type=float, default=120, help="累计上限小时")
+    ap.add_argument("--latency", type=float, default=0, help="每个请求的平均延迟 ms")
+    ap.add_argument("--jitter", type=float, default=0, help="延迟标准差 ms")
+    ap.add_argument("--render-delay", type=int, default=300, help="合同页前端渲染延迟 ms")
+    ap.add_argument("--asset-kb", type=int, default=64, help="/static 资源大小 KB")
+    ap.add_argument("--error-rate", type=float, default=0, help="错误注入概率 0~1")
+    ap.add_argument("--error-paths", default=r"^/api/", help="错误注入匹配的路径正则")
+    ap.add_argument("--challenge", action="store_true", help="登录页先返回 JS 验证页，要执行脚本拿到 cf_clearance 才能登录")
+    ap.add_argument("--session-ttl", type=int, default=86400)
+    ap.add_argument("--verbose", action="store_true")
+    return ap
+
+def start(args):
+    # 后台线程启动，返回 (server, base_url)；压测脚本直接复用
+    srv = ThreadingHTTPServer((args.host, args.port), Handler)
+    srv.daemon_threads = True
+    srv.state = FakeState(args)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv, f"http://{args.host}:{srv.server_address[1]}"
+
+if __name__ == "__main__":
+    server, url = start(build_parser().parse_args())
+    print(f"🧪 Fake GreatHost 已启动: {url}")
+    try:
+        while True: time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,66 @@
+##### gh_block.py 浏览器阶段的资源拦截 ######
+# 通过 CDP Network.setBlockedURLs 在请求发出前拦截图片/字体/媒体和第三方统计脚本，
+# 代理按流量计费，少下载就是省钱省时间。拦截统计来自 chromedriver 的 performance 日志。
+
+import os, json
+from urllib.parse import urlparse
+
+BLOCK_RESOURCES = os.getenv("BLOCK_RESOURCES", "1") == "1" #=====浏览器阶段拦截无用资源=====
+BLOCK_TYPES = os.getenv("BLOCK_TYPES", "image,font,media") #=====按类型拦截: image,font,media,stylesheet=====
+BLOCK_HOSTS = os.getenv("BLOCK_HOSTS", "google-analytics.com,googletagmanager.com,doubleclick.net,facebook.net,hotjar.com,clarity.ms,fonts.googleapis.com,fonts.gstatic.com") #=====按域名拦截 (含子域名)=====
+BLOCK_ALLOW = os.getenv("BLOCK_ALLOW", "") #=====白名单域名，从域名拦截列表中剔除=====
+
+TYPE_PATTERNS = {
+    "image": ["*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.svg*", "*.ico*", "*.avif*"],
+    "font": ["*.woff*", "*.ttf*", "*.otf*", "*.eot*"],
+    "media": ["*.mp4*", "*.webm*", "*.mp3*", "*.ogg*", "*.m3u8*"],
+    "stylesheet": ["*.css*"],
+}
+
+def split_list(raw):
+    return [x.strip().lower() for x in raw.split(",") if x.strip()]
+
+def blocked_patterns():
+    allow = split_list(BLOCK_ALLOW)
+    patterns = [p for t in split_list(BLOCK_TYPES) for p in TYPE_PATTERNS.get(t, [])]
+    for h in split_list(BLOCK_HOSTS):
+        if any(h == a or h.endswith("." + a) for a in allow): continue
+        patterns += [f"*://{h}/*", f"*://*.{h}/*"]
+    return patterns
+
+def enable_perf_log(opts, force=False):
+    # 统计拦截/下载字节需要 performance 日志，启动 Chrome 前调用
+    if BLOCK_RESOURCES or force: opts.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+def apply_blocking(driver):
+    # CDP 命令只作用于当前 target，切换窗口/新建 context 后要重新调用
+    if not BLOCK_RESOURCES: return
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_patterns()})
+    except Exception as e:
+        print(f"⚠️ 资源拦截未生效: {e}")
+
+def block_report(driver):
+    # 读出 (并清空) performance 日志，统计本阶段拦截数和实际下载字节
+    try: logs = driver.get_log("performance")
+    except Exception: return None
+    blocked, hosts, done, size = {}, {}, 0, 0
+    urls = {}
+    for entry in logs:
+        try: msg = json.loads(entry["message"])["message"]
+        except Exception: continue
+        m, p = msg.get("method"), msg.get("params", {})
+        if m == "Network.requestWillBeSent":
+            urls[p.get("requestId")] = p.get("request", {}).get("url", "")
+        elif m == "Network.loadingFinished":
+            done += 1; size += p.get("encodedDataLength", 0)
+        elif m == "Network.loadingFailed" and p.get("blockedReason"):
+            t = (p.get("type") or "Other").lower()
+            blocked[t] = blocked.get(t, 0) + 1
+            h = urlparse(urls.get(p.get("requestId"), "")).hostname or "?"
+            hosts[h] = hosts.get(h, 0) + 1
+    rep = {"blocked": sum(blocked.values()), "by_type": blocked, "by_host": hosts, "requests": done, "bytes": size}
+    detail = ", ".join(f"{k} {v}" for k, v in sorted(blocked.items(), key=lambda x: -x[1])) or "无"
+    print(f"🧱 资源拦截: 拦下 {rep['blocked']} 个请求 ({detail}) | 放行 {done} 个，下载 {size / 1024:.0f} KB")
+    return rep
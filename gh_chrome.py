@@ -0,0 +1,136 @@
+##### gh_chrome.py 常驻 Chrome (远程调试 + 每账号固定 profile) ######
+# Chrome 由这里自己拉起 (--remote-debugging-port=0 --user-data-dir=<账号目录>)，端口从 profile 目录的
+# DevToolsActivePort 读出，selenium 用 debuggerAddress 连上去。HTTP 缓存/Service Worker/cookies 都留在 profile 里，
+# 下一次续期直接复用还活着的浏览器 (省冷启动和静态资源加载)；进程挂了或启动参数变了就杀掉重开。
+
+import hashlib, json, os, shutil, signal, subprocess, threading, time
+
+PROFILE_ROOT = os.getenv("CHROME_PROFILE_ROOT", ".gh_profiles") #=====常驻模式下每个账号一个 --user-data-dir=====
+CHROME_BIN = os.getenv("CHROME_BIN", "") #=====Chrome 可执行文件，留空自动查找=====
+WARM_KEEP = os.getenv("WARM_KEEP", "0") == "1" #=====脚本退出后也不关 Chrome，下次运行 (cron) 直接连上=====
+
+# 冷启动 (greathost.new_chrome) 和常驻 Chrome 共用的启动参数，两条路径的布局和语言保持一致：
+# dom 策略要点按钮，窗口太小控制台会折叠成移动端布局；按英文链接文字 (View Details) 找元素
+CHROME_ARGS = ["--headless=new", "--no-sandbox", "--window-size=1920,1080", "--lang=en-US"]
+
+LOCAL = None # 探活只连本机，不走环境变量里的代理；urllib.request 导入要 20ms，常驻模式用到时才建
+
+def find_chrome():
+    if CHROME_BIN: return CHROME_BIN
+    for name in ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser", "chrome"):
+        path = shutil.which(name)
+        if path: return path
+    raise Exception("找不到 Chrome 可执行文件，请设置 CHROME_BIN")
+
+def profile_dir(account):
+    # 目录名用哈希，不把邮箱明文写到磁盘路径里
+    return os.path.abspath(os.path.join(PROFILE_ROOT, hashlib.sha1(account.encode()).hexdigest()[:12]))
+
+def read_port(pdir):
+    try:
+        with open(os.path.join(pdir, "DevToolsActivePort"), encoding="utf-8") as f: return int(f.readline().strip())
+    except (OSError, ValueError):
+        return None
+
+def devtools_alive(port, timeout=2):
+    global LOCAL
+    if not port: return False
+    if LOCAL is None:
+        import urllib.request
+        LOCAL = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+    try:
+        with LOCAL.open(f"http://127.0.0.1:{port}/json/version", timeout=timeout) as r: return r.status == 200
+    except Exception:
+        return False
+
+class WarmChrome:
+    def __init__(self, account, args=()):
+        self.account, self.args = account, list(args) # args: 代理等额外启动参数，变了就要重启
+        self.dir = profile_dir(account)
+        self.proc, self.port = None, None
+        self.starts = 0
+        self.lock = threading.Lock()
+
+    @property
+    def state_file(self):
+        return os.path.join(self.dir, "warm.json")
+
+    def sig(self):
+        return hashlib.sha1(json.dumps(CHROME_ARGS + self.args).encode()).hexdigest()[:12] # 基础参数变了，WARM_KEEP 留下的 Chrome 也要重开
+
+    def load_state(self):
+        try:
+            with open(self.state_file, encoding="utf-8") as f: return json.load(f)
+        except Exception: return {}
+
+    def alive(self):
+        if self.proc and self.proc.poll() is not None: return False
+        return devtools_alive(self.port)
+
+    def ensure(self, args=None):
+        # 保证有一个活着的 Chrome，返回 True 表示是新启动的 (之前连着的 driver 要重建)
+        with self.lock:
+            if args is not None and list(args) != self.args:
+                self.args = list(args)
+                if self.port: print("🔧 Chrome 启动参数变了 (换代理)，重启"); self.kill(self.load_state().get("pid"))
+            if self.port and self.alive(): return False
+            st = self.load_state()
+            port = read_port(self.dir)
+            if not self.proc and st.get("sig") == self.sig() and devtools_alive(port):
+                self.port = port # 上一次运行留下来的 Chrome (WARM_KEEP=1)
+                print(f"♨️ 连上已在运行的 Chrome (pid {st.get('pid')}, port {port})")
+                return False
+            if self.port: print("💥 Chrome 已失联，重启")
+            self.kill(st.get("pid"))
+            self.launch()
+            return True
+
+    def launch(self):
+        os.makedirs(self.dir, exist_ok=True)
+        try: os.remove(os.path.join(self.dir, "DevToolsActivePort"))
+        except OSError: pass
+        cmd = [find_chrome(), *CHROME_ARGS, "--disable-dev-shm-usage", "--no-first-run",
+               "--no-default-browser-check", "--remote-debugging-port=0", f"--user-data-dir={self.dir}", *self.args, "about:blank"]
+        t = time.perf_counter()
+        self.proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            port = read_port(self.dir)
+            if port and devtools_alive(port): break
+            if self.proc.poll() is not None: raise Exception(f"Chrome 启动失败 (exit {self.proc.returncode})")
+            time.sleep(0.1)
+        else:
+            self.kill(); raise Exception("等待 DevToolsActivePort 超时")
+        self.port = port; self.starts += 1
+        try:
+            with open(self.state_file, "w", encoding="utf-8") as f: json.dump({"pid": self.proc.pid, "port": port, "sig": self.sig()}, f)
+        except OSError: pass
+        print(f"🚀 常驻 Chrome 已启动: pid {self.proc.pid}, port {port}, {time.perf_counter() - t:.1f}s")
+
+    def owns(self, pid):
+        # warm.json 里的 pid 可能早被系统复用了，确认命令行里是这个 profile 才动手 (仅 Linux)
+        try:
+            with open(f"/proc/{pid}/cmdline", "rb") as f: return self.dir.encode() in f.read()
+        except OSError: return False
+
+    def kill(self, pid=None):
+        # 自己拉起的用进程组杀干净；上次运行留下的按 warm.json 里的 pid 杀
+        pid = self.proc.pid if self.proc else (pid if pid and self.owns(pid) else None)
+        if pid:
+            try: os.killpg(pid, signal.SIGTERM)
+            except (OSError, AttributeError):
+                try: os.kill(pid, signal.SIGTERM)
+                except OSError: pass
+            if self.proc:
+                try: self.proc.wait(10)
+                except subprocess.TimeoutExpired:
+                    try: os.killpg(pid, signal.SIGKILL)
+                    except OSError: pass
+        # 非正常退出会留下锁文件，不删的话新 Chrome 会认为 profile 正在被占用
+        for f in ("SingletonLock", "SingletonSocket", "SingletonCookie", "DevToolsActivePort"):
+            try: os.remove(os.path.join(self.dir, f))
+            except OSError: pass
+        self.proc, self.port = None, None
+
+    def shutdown(self):
+        if not WARM_KEEP: self.kill(self.load_state().get("pid"))
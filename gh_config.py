@@ -0,0 +1,21 @@
+##### gh_config.py 数值型环境变量解析 ######
+# 各模块导入时读环境变量，写错 (PROXY_TTL=abc) 不直接抛 ValueError 崩在导入阶段：
+# 记进 CONFIG_ERRORS 并用默认值，由 greathost.check_config 在启动浏览器之前统一报告。
+
+import os
+
+CONFIG_ERRORS = []
+
+def env_num(name, default, cast, label):
+    raw = os.getenv(name, "")
+    try: return cast(raw) if raw.strip() else default
+    except ValueError:
+        msg = f"{name}={raw!r} 不是{label}"
+        if msg not in CONFIG_ERRORS: CONFIG_ERRORS.append(msg)
+        return default
+
+def env_int(name, default):
+    return env_num(name, default, int, "整数")
+
+def env_float(name, default):
+    return env_num(name, default, float, "数字")
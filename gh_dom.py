@@ -0,0 +1,182 @@
+##### gh_dom.py 页面点击流程 (DOM 策略) ######
+# 原 greathost备份.py 的点击/读数逻辑：控制台 → Billing → View Details → 读累计时间 → 点续期 → 回控制台核对状态。
+# greathost.py 的 "dom" 策略调用这里；API 改版时靠它兜底。
+# FAST_MODE=1 时固定 sleep 全部换成等具体的 DOM/网络条件，拟人停顿只从 JITTER_BUDGET 里扣。
+
+import os, re, time, random
+from gh_config import env_float
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+BASE_URL = os.getenv("GH_BASE_URL", "https://greathost.es").rstrip("/")
+FAST_MODE = os.getenv("FAST_MODE", "0") == "1" #=====快速模式：固定 sleep 全部换成等具体的 DOM/网络条件=====
+JITTER_BUDGET = env_float("JITTER_BUDGET", 0) #=====快速模式下拟人随机停顿的总预算 (秒)，0 = 不停顿=====
+
+# Waits: 经典模式照旧 sleep；快速模式等 until(driver) 成立，拟人停顿从 JITTER_BUDGET 里扣
+SAVED = {} # 快速模式下每类等待比经典模式少花的时间 (秒)
+JITTER_LEFT = JITTER_BUDGET
+
+def note_saved(tag, nominal, t0):
+    SAVED[tag] = SAVED.get(tag, 0) + nominal - (time.perf_counter() - t0)
+
+def pause(tag, seconds, driver=None, until=None, timeout=10):
+    global JITTER_LEFT
+    if not FAST_MODE:
+        time.sleep(seconds); return
+    t = time.perf_counter()
+    if driver and until:
+        try: WebDriverWait(driver, timeout, poll_frequency=0.1).until(until)
+        except: pass
+    j = min(JITTER_LEFT, random.uniform(0, seconds))
+    if j > 0: JITTER_LEFT -= j; time.sleep(j)
+    note_saved(tag, seconds, t)
+
+def page_ready(d):
+    return d.execute_script("return document.readyState") == "complete"
+
+def renew_posted(d):
+    # 续期 POST 已经拿到响应 (Resource Timing 里 fetch 完成才会出现条目)
+    return d.execute_script("return performance.getEntriesByType('resource').some(e => e.name.includes('renew-free') && e.responseEnd > 0)")
+
+def saved_report():
+    if not FAST_MODE: return ""
+    parts = " · ".join(f"{k} {v:.1f}s" for k, v in sorted(SAVED.items(), key=lambda x: -x[1]) if v > 0.05)
+    return f"⚡ 快速模式共省 {sum(SAVED.values()):.1f}s ({parts or '无'})，拟人停顿用掉 {JITTER_BUDGET - JITTER_LEFT:.1f}/{JITTER_BUDGET:.0f}s"
+
+# Click helpers
+def safe_click(driver, el):
+    try: el.click()
+    except:
+        try: driver.execute_script("arguments[0].click();", el)
+        except: raise
+
+def click_button(driver, el, desc, js_selector=None, until=page_ready):
+    # until: 点击后要等的条件 (跳转完成、POST 返回等)，快速模式下代替固定 2 秒
+    try:
+        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", el)
+        pause("scroll", random.uniform(1.0,2.0))
+        safe_click(driver, el); pause("after_click", 2, driver, until); print("Clicked:", desc); return True
+    except Exception as e:
+        print("Click failed:", e, "try JS")
+        try:
+            if js_selector:
+                driver.execute_script(f"document.querySelector('{js_selector}').click();")
+            else:
+                driver.execute_script("arguments[0].click();", el)
+            pause("after_click", 2, driver, until); return True
+        except Exception as e2:
+            print("JS click failed:", e2); return False
+
+def perform_step(driver, wait, desc, locator, js_selector=None, until=page_ready):
+    try:
+        el = wait.until(EC.element_to_be_clickable(locator))
+        return click_button(driver, el, desc, js_selector, until)
+    except Exception as e:
+        print(desc, "failed:", e); return False
+
+def row_xpath(name):
+    # 服务器名所在的那一行：最近的、同时包含 Billing 按钮的祖先节点
+    lit = f'"{name}"' if '"' not in name else f"'{name}'"
+    return (f"//*[contains(concat(' ', normalize-space(@class), ' '), ' server-name ') and normalize-space()={lit}]"
+            f"/ancestor::*[.//*[contains(@class,'btn-billing-compact')]][1]")
+
+def scope(driver, wait, name):
+    # 按服务器名找控制台上的那一行；页面上没有 .server-name 这样的行 (老页面结构) 且只有一台时退回点第一台
+    if not name: return None
+    try: wait.until(EC.presence_of_element_located((By.CLASS_NAME, "btn-billing-compact")))
+    except: return name
+    if driver.find_elements(By.XPATH, row_xpath(name)): return name
+    if len(driver.find_elements(By.CLASS_NAME, "btn-billing-compact")) == 1:
+        print(f"控制台上按名字找不到 {name}，只有一台服务器，按第一台处理"); return None
+    return name
+
+# Core actions
+def list_servers(driver):
+    # API 拿不到服务器列表时从控制台页面读：名字 + (能从 billing 链接里认出来的) ID
+    driver.get(f"{BASE_URL}/dashboard")
+    WebDriverWait(driver, 15).until(EC.presence_of_element_located((By.CLASS_NAME, "server-name")))
+    return driver.execute_script("""return [...document.querySelectorAll('.server-name')].map(el => {
+        let row = el; while (row && !row.querySelector('.btn-billing-compact')) row = row.parentElement;
+        const m = row && row.innerHTML.match(/\\/billing\\/([\\w-]+)/);
+        return {name: el.textContent.trim(), id: m ? m[1] : null};
+    })""")
+
+def simulate_human(driver, wait):
+    if random.random() > 0.5:
+        if FAST_MODE and JITTER_LEFT <= 0: # 纯拟人的两次跳转，没有抖动预算就整段跳过
+            SAVED["simulate_human"] = SAVED.get("simulate_human", 0) + 4.5 + 1.4; return
+        driver.get(f"{BASE_URL}/services"); pause("simulate_human", random.randint(3,6), driver, page_ready)
+        driver.get(f"{BASE_URL}/dashboard"); wait.until(EC.url_contains("/dashboard"))
+        pause("simulate_human", random.uniform(0.8,2.0))
+
+def go_to_details(driver, wait, name=None):
+    # name 为空时沿用老逻辑点第一台
+    if "/dashboard" not in driver.current_url: driver.get(f"{BASE_URL}/dashboard")
+    name = scope(driver, wait, name)
+    billing = (By.XPATH, f"{row_xpath(name)}//*[contains(@class,'btn-billing-compact')]") if name else (By.CLASS_NAME,'btn-billing-compact')
+    if not perform_step(driver, wait, f"Billing icon {name or ''}".strip(), billing, None if name else ".btn-billing-compact",
+                        lambda d: "/billing" in d.current_url and page_ready(d)):
+        raise Exception(f"控制台上找不到服务器 {name} 的 Billing 按钮")
+    perform_step(driver, wait, "View Details", (By.LINK_TEXT,'View Details'), "a[href*='details']",
+                 lambda d: re.search(r"/(details|contracts)/", d.current_url) and page_ready(d))
+    return driver.current_url.split('/')[-1] or "unknown"
+
+def hours_text(driver, selector="#accumulated-time"):
+    try: return driver.execute_script("return (document.querySelector(arguments[0])||{textContent:''}).textContent;", selector) or ""
+    except: return ""
+
+def get_hours(driver, selector="#accumulated-time"):
+    for _ in range(3):
+        try:
+            el = WebDriverWait(driver, 6).until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
+            text = driver.execute_script("return (arguments[0]||{textContent:''}).textContent;", el) or el.text or ""
+        except:
+            text = hours_text(driver, selector)
+        num = int(re.sub(r'\D', '', text)) if re.search(r'\d', text or '') else 0
+        if num: return num, text.strip()
+        pause("get_hours", random.uniform(2.5, 4.5), driver, lambda d: re.search(r'\d', hours_text(d, selector)), timeout=4.5)
+    return 0, (text or "").strip()
+
+def get_error_msg(driver):
+    js = "return document.body.innerText.includes('5 días') ? 'No puedes renovar más de 5 días' : ''"
+    try: return driver.execute_script(js).strip()
+    except: return ""
+
+def renew_click(driver, wait):
+    before = hours_text(driver)
+    # POST 返回且页面有反应 (累计时间变化或出现报错) 才算点击完成
+    perform_step(driver, wait, "Renew button", (By.ID,'renew-free-server-btn'), until=lambda d: renew_posted(d) and
+                 (hours_text(d) != before or get_error_msg(d) or d.execute_script("return (document.getElementById('renew-msg')||{innerText:''}).innerText")))
+    if FAST_MODE: # 页面已经刷新过，查一次报错就够了，不用再轮询 3 秒
+        t = time.perf_counter(); msg = get_error_msg(driver)
+        if msg: print(f"DEBUG: 抓到报错 -> {msg}")
+        else: note_saved("renew_poll", 3, t)
+        return msg
+    end = time.time() + 3
+    while time.time() < end:
+        msg = get_error_msg(driver)
+        if msg:
+            print(f"DEBUG: 抓到报错 -> {msg}")
+            return msg
+        time.sleep(random.uniform(0.3, 0.6))
+    return ""
+
+def confirm_and_start(driver, wait, name=None):
+    # 回控制台读状态灯，已关机/离线就点启动；name 为空时看第一台
+    final = "Unknown"; started = False; row = ""
+    try:
+        driver.get(f"{BASE_URL}/dashboard")
+        name = scope(driver, wait, name); row = row_xpath(name) if name else ""
+        ind = (By.XPATH, f"{row}//*[contains(@class,'server-status-indicator')]")
+        wait.until(EC.presence_of_element_located(ind))
+        pause("status", 1.5, driver, lambda d: d.find_element(*ind).get_attribute('title'))
+        final = driver.find_element(*ind).get_attribute('title') or "Unknown"
+    except Exception as e:
+        print("Final status fetch failed:", e); final = "确认失败"
+    low = final.lower()
+    if any(x in low for x in ['stopped','offline']):
+        print("Final state offline/stopped, try start")
+        started = perform_step(driver, wait, "Start button", (By.XPATH, f"{row}//*[contains(@class,'btn-start') or contains(@class,'action-start')]"),
+                               None if name else "button.btn-start, .action-start")
+    return final, started
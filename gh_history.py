@@ -0,0 +1,136 @@
+##### gh_history.py 续期历史 (SQLite，只追加) ######
+# 每次运行每台服务器一行：续期前后小时、状态、冷却、返回消息、落地 IP、代理。
+# 按 (账号, 服务器, 时间) / (代理, 时间) / 时间 建索引，README 的历史部分从这里增量渲染。
+# python gh_history.py [--days 7]  查看各代理成功率、典型冷却周期、剩余小时趋势
+
+import argparse, os, re, sqlite3, statistics, threading, time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from gh_config import env_int
+from gh_proxy import mask_proxy, mask_email
+
+HISTORY_DB = os.getenv("HISTORY_DB", ".gh_history.db") #=====续期历史数据库，留空不记录=====
+README_ROWS = env_int("HISTORY_README_ROWS", 20) #=====README 里保留的最近事件条数=====
+
+OK_KINDS = ("renew_success", "cooldown", "maxed_out") # 流程跑通了 (不代表一定续上)
+EVENT_KINDS = ("renew_success", "maxed_out", "renew_failed", "error") # 冷却是常态，不进 README 事件表，避免每次运行都改 README
+START = "<!-- history:start -->"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS renewals (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL, run TEXT, account TEXT NOT NULL, server TEXT NOT NULL, sid TEXT,
+    kind TEXT NOT NULL, before_h REAL, after_h REAL, status TEXT, cooldown_min REAL,
+    message TEXT, ip TEXT, proxy TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_renewals_acct_srv_ts ON renewals (account, server, ts);
+CREATE INDEX IF NOT EXISTS idx_renewals_proxy_ts ON renewals (proxy, ts);
+CREATE INDEX IF NOT EXISTS idx_renewals_ts ON renewals (ts);
+"""
+
+COLS = ("ts", "run", "account", "server", "sid", "kind", "before_h", "after_h", "status", "cooldown_min", "message", "ip", "proxy")
+
+def fmt_ts(ts):
+    return datetime.fromtimestamp(ts, ZoneInfo("Asia/Shanghai")).strftime("%m/%d %H:%M")
+
+class History:
+    def __init__(self, path=HISTORY_DB):
+        self.path, self.db = path, None
+        self.lock = threading.Lock()
+
+    def conn(self):
+        if self.db is None:
+            self.db = sqlite3.connect(self.path, check_same_thread=False)
+            self.db.row_factory = sqlite3.Row
+            self.db.executescript(SCHEMA)
+        return self.db
+
+    def query(self, sql, args=()):
+        if not self.path: return []
+        with self.lock: return self.conn().execute(sql, args).fetchall()
+
+    def add(self, rows):
+        # rows: [{account, server, kind, ...}]，缺的列记 NULL
+        if not self.path or not rows: return
+        vals = [tuple(r.get(c) if c != "ts" else r.get("ts") or time.time() for c in COLS) for r in rows]
+        try:
+            with self.lock, self.conn() as db:
+                db.executemany(f"INSERT INTO renewals ({','.join(COLS)}) VALUES ({','.join('?' * len(COLS))})", vals)
+        except Exception as e:
+            print(f"⚠️ 历史记录写入失败: {e}")
+
+    # ---- 查询 ----
+    def success_by_proxy(self, days=7):
+        rows = self.query(f"""SELECT proxy, COUNT(*) AS n, SUM(kind IN {OK_KINDS}) AS ok, SUM(kind = 'renew_success') AS renewed
+                              FROM renewals WHERE ts >= ? GROUP BY proxy ORDER BY n DESC""", (time.time() - days * 86400,))
+        return [{"proxy": r["proxy"] or "direct", "n": r["n"], "ok": r["ok"], "renewed": r["renewed"],
+                 "rate": r["ok"] / r["n"]} for r in rows]
+
+    def typical_cooldown(self, account=None, server=None, days=30):
+        # 两次成功续期之间的间隔 = 实际冷却周期；另附观测到的剩余冷却分钟中位数
+        where, args = "ts >= ?", [time.time() - days * 86400]
+        if account: where += " AND account = ?"; args.append(account)
+        if server: where += " AND server = ?"; args.append(server)
+        gaps = [r["gap"] for r in self.query(f"""SELECT (ts - LAG(ts) OVER (PARTITION BY account, server ORDER BY ts)) / 60 AS gap
+                                               FROM renewals WHERE {where} AND kind = 'renew_success'""", args) if r["gap"]]
+        waits = [r["cooldown_min"] for r in self.query(f"SELECT cooldown_min FROM renewals WHERE {where} AND kind = 'cooldown' AND cooldown_min IS NOT NULL", args)]
+        return {"cycle_min": statistics.median(gaps) if gaps else None, "cycles": len(gaps),
+                "wait_min": statistics.median(waits) if waits else None, "waits": len(waits)}
+
+    def hours_trend(self, account, server, limit=50):
+        rows = self.query("""SELECT ts, kind, before_h, after_h FROM renewals WHERE account = ? AND server = ?
+                             ORDER BY ts DESC LIMIT ?""", (account, server, limit))
+        return [dict(r) for r in reversed(rows)]
+
+    def latest(self, kinds=None):
+        # 每台服务器最近一条 (走 account, server, ts 索引)；kinds 限定只看哪些结果
+        cond = f"WHERE kind IN ({','.join('?' * len(kinds))})" if kinds else ""
+        return [dict(r) for r in self.query(f"""SELECT r.* FROM renewals r JOIN (SELECT account, server, MAX(ts) AS ts FROM renewals {cond} GROUP BY account, server) l
+                                                ON r.account = l.account AND r.server = l.server AND r.ts = l.ts ORDER BY r.account, r.server""", tuple(kinds or ()))]
+
+    # ---- README ----
+    def render_readme(self, readme="README.md"):
+        # 事件表增量更新：只查上次渲染之后的新行，拼到原有表格前面
+        if not self.path: return
+        try:
+            with open(readme, encoding="utf-8") as f: text = f.read()
+        except OSError:
+            text = ""
+        head, _, block = text.partition(START)
+        m = re.search(r"<!-- history:end last=(\d+) -->", block)
+        last = int(m.group(1)) if m else 0
+        top = self.query("SELECT MAX(id) AS id FROM renewals")[0]["id"] or 0
+        new = self.query(f"SELECT * FROM renewals WHERE id > ? AND id <= ? AND kind IN {EVENT_KINDS} ORDER BY id DESC", (last, top))
+        if m and not new: return
+        old = [l for l in block.split("### 最近事件", 1)[-1].splitlines() if l.startswith("| ") and not l.startswith("| 时间")] if m else []
+        events = [f"| {fmt_ts(r['ts'])} | {mask_email(r['account'])} | {r['server']} | {r['kind']} | {r['before_h'] or 0:g} ➔ {r['after_h'] or 0:g}h | {mask_proxy(r['proxy'])} |" for r in new]
+        events = (events + old)[:README_ROWS]
+        state = [f"| {mask_email(r['account'])} | {r['server']} | {r['after_h'] or r['before_h'] or 0:g}h | {r['kind']} | {r['status'] or '-'} |"
+                 for r in self.latest(EVENT_KINDS)]
+        lines = [START, "## 续期历史", "", "### 服务器状态 (最近一次有变化的结果)", "", "| 账号 | 服务器 | 剩余 | 结果 | 状态 |", "|---|---|---|---|---|", *state,
+                 "", "### 最近事件", "", "| 时间 | 账号 | 服务器 | 结果 | 小时 | 代理 |", "|---|---|---|---|---|---|", *events, "",
+                 f"<!-- history:end last={top} -->"]
+        try:
+            with open(readme, "w", encoding="utf-8") as f: f.write(head.rstrip("\n") + ("\n\n" if head.strip() else "") + "\n".join(lines) + "\n")
+        except OSError as e:
+            print(f"⚠️ README 历史写入失败: {e}")
+
+HISTORY = History()
+
+def main():
+    ap = argparse.ArgumentParser(description="续期历史统计")
+    ap.add_argument("--db", default=HISTORY_DB)
+    ap.add_argument("--days", type=int, default=7)
+    args = ap.parse_args()
+    h = History(args.db)
+    print(f"🌐 近 {args.days} 天各代理成功率:")
+    for r in h.success_by_proxy(args.days):
+        print(f"  {r['proxy']:<32} {r['ok']}/{r['n']} ({r['rate'] * 100:.0f}%) | 续上 {r['renewed']} 次")
+    for r in h.latest():
+        cd = h.typical_cooldown(r["account"], r["server"])
+        trend = " → ".join(f"{t['after_h'] or t['before_h'] or 0:g}" for t in h.hours_trend(r["account"], r["server"], 10))
+        cycle = f"{cd['cycle_min']:.0f} 分钟 ({cd['cycles']} 次)" if cd["cycle_min"] else "-"
+        print(f"🖥️ {mask_email(r['account'])} / {r['server']}: 续期周期 {cycle} | 剩余小时 {trend}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+##### gh_metrics.py 分阶段计时 ######
+# with span("login", account=...): ...  记录耗时/结果/代理，结束时写 JSON lines，可选 Prometheus textfile
+
+import os, json, time, uuid, threading
+from contextlib import contextmanager
+
+METRICS_FILE = os.getenv("METRICS_FILE", "metrics.jsonl") #=====每个阶段一行 JSON，留空不写=====
+PROM_FILE = os.getenv("PROM_FILE", "") #=====node_exporter textfile 路径，留空不写=====
+
+class Spans:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.items, self.run_id, self.started = [], uuid.uuid4().hex[:12], time.time()
+
+    @contextmanager
+    def span(self, name, **labels):
+        t, outcome, err = time.perf_counter(), "ok", ""
+        try:
+            yield
+        except BaseException as e:
+            outcome, err = "error", str(e)[:200]
+            raise
+        finally:
+            item = {"ts": round(time.time(), 3), "run": self.run_id, "span": name,
+                    "wall_ms": round((time.perf_counter() - t) * 1000, 1), "outcome": outcome}
+            item.update({k: v for k, v in labels.items() if v is not None})
+            if err: item["error"] = err
+            with self.lock: self.items.append(item)
+
+    def totals(self):
+        out = {}
+        with self.lock:
+            for it in self.items: out[it["span"]] = out.get(it["span"], 0) + it["wall_ms"]
+        return out
+
+    def summary(self, top=5):
+        tot = sorted(self.totals().items(), key=lambda x: -x[1])
+        parts = " · ".join(f"{k} {v / 1000:.1f}s" for k, v in tot[:top])
+        return f"⏱️ 耗时: 总 {time.time() - self.started:.1f}s | {parts}" if parts else ""
+
+    def export(self):
+        with self.lock: items = list(self.items)
+        if METRICS_FILE and items:
+            try:
+                with open(METRICS_FILE, "a", encoding="utf-8") as f:
+                    for it in items: f.write(json.dumps(it, ensure_ascii=False) + "\n")
+            except Exception as e:
+                print(f"⚠️ 指标写入失败: {e}")
+        if PROM_FILE and items:
+            agg = {}
+            for it in items:
+                k = (it["span"], it["outcome"])
+                n, s = agg.get(k, (0, 0))
+                agg[k] = (n + 1, s + it["wall_ms"] / 1000)
+            lines = ["# HELP greathost_span_seconds Wall time spent per phase in the last run.",
+                     "# TYPE greathost_span_seconds gauge"]
+            lines += [f'greathost_span_seconds{{span="{k[0]}",outcome="{k[1]}"}} {s:.3f}' for k, (n, s) in agg.items()]
+            lines += ["# HELP greathost_span_count Number of spans per phase in the last run.",
+                      "# TYPE greathost_span_count gauge"]
+            lines += [f'greathost_span_count{{span="{k[0]}",outcome="{k[1]}"}} {n}' for k, (n, s) in agg.items()]
+            lines += ["# HELP greathost_last_run_timestamp_seconds Unix time the last run finished.",
+                      "# TYPE greathost_last_run_timestamp_seconds gauge",
+                      f"greathost_last_run_timestamp_seconds {time.time():.0f}"]
+            try:
+                tmp = f"{PROM_FILE}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f: f.write("\n".join(lines) + "\n")
+                os.replace(tmp, PROM_FILE)
+            except Exception as e:
+                print(f"⚠️ Prometheus 指标写入失败: {e}")
+
+SPANS = Spans()
+span = SPANS.span
@@ -0,0 +1,104 @@
+##### gh_notify.py 通知队列 ######
+# put() 只入队不阻塞，flush() 在运行结束时把队列合并成一条摘要发 Telegram：
+# 429 按 retry_after 等待，网络错误/5xx 指数退避；README 只在各服务器状态块变化时重写 (页脚的耗时/资源统计不算)，
+# 重写时保留 gh_history.py 维护的历史部分 (<!-- history:start --> 之后)。
+
+import hashlib, re, threading, time
+
+TG_LIMIT = 4000 # Telegram 单条上限 4096，留点余量
+SEPARATOR = "\n\n──────────\n\n"
+
+def to_markdown(msg):
+    return msg.replace("<b>", "**").replace("</b>", "**").replace("<code>", "`").replace("</code>", "`")
+
+def status_digest(md):
+    # 只对服务器状态块取摘要；时间戳和耗时每次都不一样，不算“状态变化”
+    lines = [l for l in md.splitlines() if not re.match(r"\s*(📅|⏱️)", l)]
+    return hashlib.sha1("\n".join(lines).encode()).hexdigest()[:16]
+
+def split_message(m, limit=TG_LIMIT, seps=("\n\n", "\n")):
+    # 超长消息按空行 (一台服务器一块) 切，单块还超长再按行切，实在不行才硬切——硬切可能切断 <b> 之类的标签
+    if len(m) <= limit: return [m]
+    if not seps: return [m[i:i + limit] for i in range(0, len(m), limit)]
+    out, cur, sep = [], "", seps[0]
+    for part in m.split(sep):
+        for p in split_message(part, limit, seps[1:]):
+            if cur and len(cur) + len(sep) + len(p) > limit: out.append(cur); cur = ""
+            cur = f"{cur}{sep}{p}" if cur else p
+    if cur: out.append(cur)
+    return out
+
+def chunks(msgs, limit=TG_LIMIT):
+    out, cur = [], ""
+    for m in (p for msg in msgs for p in split_message(msg, limit)):
+        if cur and len(cur) + len(SEPARATOR) + len(m) > limit:
+            out.append(cur); cur = ""
+        cur = f"{cur}{SEPARATOR}{m}" if cur else m
+    if cur: out.append(cur)
+    return out
+
+class Notifier:
+    def __init__(self, token, chat_id, readme="README.md", retries=4, now=lambda: time.strftime('%Y/%m/%d %H:%M:%S')):
+        self.token, self.chat_id, self.readme, self.retries, self.now = token, chat_id, readme, retries, now
+        self.queue, self.lock = [], threading.Lock()
+        self.session = None # 第一次真要发 Telegram 时才建 (requests 按需导入)
+
+    def put(self, msg, status=None):
+        # status: 决定 README 要不要重写的那部分 (各服务器状态块)，不传时用整条消息
+        with self.lock: self.queue.append((msg, msg if status is None else status))
+
+    def flush(self):
+        with self.lock: items, self.queue = self.queue, []
+        if not items: return
+        msgs = [m for m, _ in items]
+        if self.token and self.chat_id:
+            for text in chunks(msgs): self.send(text)
+        self.write_readme(SEPARATOR.join(msgs), SEPARATOR.join(st for _, st in items))
+
+    def flush_async(self):
+        t = threading.Thread(target=self.flush, daemon=True)
+        t.start()
+        return t
+
+    def send(self, text):
+        import requests
+        if not self.session:
+            self.session = requests.Session()
+            self.session.trust_env = False # 强制直连，不走代理
+        url = f"https://api.telegram.org/bot{self.token}/sendMessage"
+        for attempt in range(self.retries):
+            try:
+                r = self.session.post(url, data={"chat_id": self.chat_id, "text": text, "parse_mode": "HTML"}, timeout=10)
+                if r.status_code == 200: return True
+                if r.status_code == 429:
+                    wait = (r.json().get("parameters") or {}).get("retry_after", 2 ** attempt)
+                    print(f"⚠️ Telegram 限流，{wait}s 后重试")
+                    time.sleep(wait); continue
+                if r.status_code < 500:
+                    print(f"⚠️ Telegram 拒绝消息 (HTTP {r.status_code}): {r.text[:200]}")
+                    return False
+                print(f"⚠️ Telegram 服务端错误 (HTTP {r.status_code})，重试 {attempt + 1}/{self.retries}")
+            except requests.RequestException as e:
+                print(f"⚠️ Telegram 发送失败: {e}，重试 {attempt + 1}/{self.retries}")
+            time.sleep(2 ** attempt)
+        print("🚨 Telegram 多次重试仍失败，放弃本条通知")
+        return False
+
+    def write_readme(self, msg, status=None):
+        md = to_markdown(msg)
+        digest = status_digest(to_markdown(msg if status is None else status))
+        tail = ""
+        try:
+            with open(self.readme, encoding="utf-8") as f:
+                old = f.read()
+            if f"<!-- status:{digest} -->" in old:
+                print("📝 状态未变化，README 不重写")
+                return
+            if "<!-- history:start -->" in old: tail = "\n<!-- history:start -->" + old.split("<!-- history:start -->", 1)[1]
+        except OSError:
+            pass
+        try:
+            with open(self.readme, "w", encoding="utf-8") as f:
+                f.write(f"# GreatHost 自动续期状态\n\n{md}\n\n> 最近更新: {self.now()}\n<!-- status:{digest} -->\n{tail}")
+        except OSError as e:
+            print(f"⚠️ README 写入失败: {e}")
@@ -0,0 +1,271 @@
+##### gh_proxy.py 代理工具：Chrome 原生代理参数 + 带认证上游的本地 SOCKS5 转发 + 代理池 ######
+# Chrome 的 --proxy-server 不支持带用户名密码的代理，这里起一个本地无认证的 SOCKS5，
+# 再由它带认证连上游 (socks5 或 http CONNECT)。只做 TCP 透传，不解密 TLS。
+# ProxyPool: 多个代理的健康/出口 IP/延迟检测结果按 TTL 缓存到磁盘，挑最快的健康代理，超时可换下一个。
+# 直连也按 "direct" 缓存出口 IP，落地 IP 查询不再每次都走一遍。
+
+import base64, ipaddress, json, os, select, socket, socketserver, struct, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, unquote
+from gh_config import env_int
+
+def parse_proxy(url):
+    u = urlparse(url if "://" in url else f"http://{url}")
+    scheme = (u.scheme or "http").lower()
+    port = u.port or (1080 if scheme.startswith("socks") else 8080)
+    return scheme, u.hostname, port, unquote(u.username or ""), unquote(u.password or "")
+
+def recv_exact(sock, n):
+    buf = b""
+    while len(buf) < n:
+        chunk = sock.recv(n - len(buf))
+        if not chunk: raise OSError("connection closed")
+        buf += chunk
+    return buf
+
+def open_upstream(proxy, host, port, timeout=15):
+    # 通过上游代理建立到 host:port 的隧道，返回已连通的 socket
+    scheme, phost, pport, user, pw = proxy
+    s = socket.create_connection((phost, pport), timeout)
+    try:
+        if scheme.startswith("socks"):
+            s.sendall(b"\x05\x02\x00\x02" if user else b"\x05\x01\x00")
+            method = recv_exact(s, 2)[1]
+            if method == 2:
+                u, p = user.encode(), pw.encode()
+                s.sendall(b"\x01" + bytes([len(u)]) + u + bytes([len(p)]) + p)
+                if recv_exact(s, 2)[1] != 0: raise OSError("socks5 认证失败")
+            elif method != 0:
+                raise OSError("socks5 无可用认证方式")
+            h = host.encode()
+            s.sendall(b"\x05\x01\x00\x03" + bytes([len(h)]) + h + struct.pack(">H", port))
+            rep = recv_exact(s, 4)
+            if rep[1] != 0: raise OSError(f"socks5 连接失败 (code {rep[1]})")
+            skip = {1: 4, 4: 16}.get(rep[3]) or recv_exact(s, 1)[0]
+            recv_exact(s, skip + 2)
+        else:
+            target = f"[{host}]:{port}" if ":" in host else f"{host}:{port}"
+            auth = ""
+            if user:
+                auth = "Proxy-Authorization: Basic " + base64.b64encode(f"{user}:{pw}".encode()).decode() + "\r\n"
+            s.sendall(f"CONNECT {target} HTTP/1.1\r\nHost: {target}\r\n{auth}\r\n".encode())
+            buf = b""
+            while b"\r\n\r\n" not in buf:
+                chunk = s.recv(4096)
+                if not chunk: raise OSError("http 代理断开")
+                buf += chunk
+            status = buf.split(b"\r\n", 1)[0]
+            if b" 200" not in status: raise OSError(f"http CONNECT 失败: {status.decode(errors='ignore')}")
+        s.settimeout(None)
+        return s
+    except:
+        s.close(); raise
+
+def pipe(a, b, counter):
+    socks = [a, b]
+    try:
+        while True:
+            r, _, _ = select.select(socks, [], [], 300)
+            if not r: return
+            for src in r:
+                data = src.recv(65536)
+                if not data: return
+                (b if src is a else a).sendall(data)
+                counter(len(data))
+    except OSError:
+        pass
+    finally:
+        for x in socks:
+            try: x.close()
+            except: pass
+
+class _Socks5Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        c = self.request
+        try:
+            n = recv_exact(c, 2)[1]; recv_exact(c, n)
+            c.sendall(b"\x05\x00")
+            _, cmd, _, atyp = recv_exact(c, 4)
+            if atyp == 1: host = socket.inet_ntoa(recv_exact(c, 4))
+            elif atyp == 4: host = socket.inet_ntop(socket.AF_INET6, recv_exact(c, 16))
+            else: host = recv_exact(c, recv_exact(c, 1)[0]).decode()
+            port = struct.unpack(">H", recv_exact(c, 2))[0]
+            if cmd != 1:
+                c.sendall(b"\x05\x07\x00\x01" + b"\x00" * 6); return
+            try:
+                up = open_upstream(self.server.upstream, host, port)
+            except Exception as e:
+                print(f"⚠️ 本地转发连接上游失败 {host}:{port}: {e}")
+                c.sendall(b"\x05\x05\x00\x01" + b"\x00" * 6); return
+            c.sendall(b"\x05\x00\x00\x01" + b"\x00" * 6)
+            pipe(c, up, self.server.count)
+        except OSError:
+            pass
+
+class LocalForwarder(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, upstream_url):
+        super().__init__(("127.0.0.1", 0), _Socks5Handler)
+        self.upstream = parse_proxy(upstream_url)
+        self.bytes = 0
+        self.lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self):
+        return f"socks5://127.0.0.1:{self.server_address[1]}"
+
+    def count(self, n):
+        with self.lock: self.bytes += n
+
+_FORWARDERS = {}
+
+def chrome_proxy(url):
+    # 返回可直接给 --proxy-server 用的地址；带认证的代理自动走本地转发 (同一进程内复用)
+    scheme, host, port, user, _ = parse_proxy(url)
+    if not user:
+        return f"{'socks5' if scheme.startswith('socks') else scheme}://{host}:{port}"
+    if url not in _FORWARDERS:
+        _FORWARDERS[url] = LocalForwarder(url)
+        print(f"🔁 本地代理转发已启动: {_FORWARDERS[url].url} -> {scheme}://{host}:{port}")
+    return _FORWARDERS[url].url
+
+def mask_host(h):
+    if not h: return "Unknown"
+    if ":" in h:
+        p = h.split(':')
+        return f"{p[0]}:{p[1]}:****:{p[-1]}" if len(p) > 3 else f"{h[:9]}****"
+    parts = h.split('.')
+    if len(parts) == 4: return f"{parts[0]}.{parts[1]}.***.{parts[3]}"
+    if len(parts) >= 3: return f"{parts[0]}.****.{parts[-1]}"
+    return f"{h[:4]}****"
+
+def expected_host(url):
+    try:
+        host = urlparse(url if "://" in url else f"http://{url}").hostname
+        return host.lower().replace("[", "").replace("]", "") if host else None
+    except Exception:
+        return None
+
+def egress_mismatch(url, current_ip):
+    # BLOCK_ERR 策略：出口 IP 必须和代理地址一致 (IPv6 比较前 4 段)，不一致返回 "BLOCK_ERR|配置|实际"
+    exp = expected_host(url)
+    if not exp: return None
+    match_full = (exp in current_ip) or (current_ip in url.lower())
+    ipv6_match = (":" in current_ip and ":" in exp and current_ip.split(':')[:4] == exp.split(':')[:4])
+    return None if (match_full or ipv6_match) else f"BLOCK_ERR|{mask_host(exp)}|{mask_host(current_ip)}"
+
+def is_ip(host):
+    try: ipaddress.ip_address(host or ""); return True
+    except ValueError: return False
+
+class ProxyPool:
+    # strict: "1" 所有代理都校验出口 IP；"ip" 只校验以 IP 配置的代理 (域名网关出口本来就会变)；"0" 不校验
+    def __init__(self, urls, cache_file=".gh_proxy_cache.json", ttl=600, strict="ip",
+                 check_url="https://api64.ipify.org?format=json", timeout=12):
+        self.urls = [u for u in urls if u and u.strip().lower() != "none"]
+        self.cache_file, self.ttl, self.strict, self.check_url, self.timeout = cache_file, ttl, strict, check_url, timeout
+        self.lock = threading.Lock()
+        self.cache = self.load()
+
+    @classmethod
+    def from_env(cls, check_url=None, strict="ip"):
+        raw = os.getenv("PROXY_URLS") or os.getenv("PROXY_URL") or ""
+        urls = [u.strip() for u in raw.replace("\n", ",").split(",") if u.strip()]
+        return cls(urls, os.getenv("PROXY_CACHE_FILE", ".gh_proxy_cache.json"), env_int("PROXY_TTL", 600),
+                   os.getenv("PROXY_STRICT", strict), check_url or os.getenv("IP_CHECK_URL", "https://api64.ipify.org?format=json"))
+
+    def load(self):
+        try:
+            with open(self.cache_file, encoding="utf-8") as f: return json.load(f)
+        except Exception: return {}
+
+    def save(self):
+        try:
+            tmp = f"{self.cache_file}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f: json.dump(self.cache, f, indent=1)
+            os.replace(tmp, self.cache_file)
+        except Exception as e:
+            print(f"⚠️ 代理缓存写入失败: {e}")
+
+    def key(self, url):
+        # 缓存里不存密码，按 scheme://user@host:port 区分
+        if not url: return "direct"
+        scheme, host, port, user, _ = parse_proxy(url)
+        return f"{scheme}://{user + '@' if user else ''}{host}:{port}"
+
+    def fresh(self, url):
+        e = self.cache.get(self.key(url))
+        return e if e and time.time() - e.get("ts", 0) < self.ttl else None
+
+    def strict_for(self, url):
+        return self.strict == "1" or (self.strict == "ip" and is_ip(expected_host(url)))
+
+    def check(self, url, force=False):
+        if not force:
+            e = self.fresh(url)
+            if e: return e
+        import requests # 只有真的要探测时才需要
+        t = time.perf_counter()
+        e = {"ts": time.time(), "ok": False, "ip": "", "latency_ms": None, "reason": ""}
+        try:
+            r = requests.get(self.check_url, proxies={"http": url, "https": url} if url else None, timeout=self.timeout)
+            e["latency_ms"] = round((time.perf_counter() - t) * 1000)
+            e["ip"] = r.json().get("ip", "").lower()
+            e["reason"] = (egress_mismatch(url, e["ip"]) if self.strict_for(url) else None) or ""
+            e["ok"] = not e["reason"]
+        except Exception as ex:
+            e["reason"] = str(ex)[:200]
+        with self.lock:
+            self.cache[self.key(url)] = e
+            self.save()
+        print(f"🩺 代理检测 {proxy_host(url)}: {'✅' if e['ok'] else '❌'} {e['ip'] or '-'} {e['latency_ms'] or '-'}ms {e['reason'][:60]}")
+        return e
+
+    def pick(self, exclude=()):
+        # 直连返回 ""；有代理但都不可用时抛异常 (BLOCK_ERR 原样带出)
+        if not self.urls: return ""
+        cands = [u for u in self.urls if u not in exclude]
+        if not cands: raise Exception("代理池已无可用代理")
+        if len(cands) == 1 and not self.fresh(cands[0]) and not self.strict_for(cands[0]):
+            return cands[0] # 只有一个候选又不校验出口 IP，没什么可挑的：不在登录前同步探测，交给后台的 lookup_ip
+        with ThreadPoolExecutor(max_workers=len(cands)) as ex:
+            results = list(zip(cands, ex.map(self.check, cands)))
+        ok = sorted((e["latency_ms"] or 0, u) for u, e in results if e["ok"])
+        if ok: return ok[0][1]
+        reasons = [e["reason"] for _, e in results]
+        raise Exception(next((r for r in reasons if r.startswith("BLOCK_ERR")), f"代理预检失败: {reasons[0]}"))
+
+    def mark_bad(self, url, reason):
+        if not url: return
+        with self.lock:
+            self.cache[self.key(url)] = {"ts": time.time(), "ok": False, "ip": "", "latency_ms": None, "reason": str(reason)[:200]}
+            self.save()
+        print(f"🔀 代理 {proxy_host(url)} 标记为不可用: {str(reason)[:80]}")
+
+    def egress_ip(self, url):
+        if not url: return ""
+        e = self.fresh(url)
+        return e.get("ip", "") if e else ""
+
+    def lookup_ip(self, url):
+        # 落地 IP：TTL 内直接用缓存 (pick 时已经探测过)，否则用 HTTP 客户端走同一代理查一次
+        return self.check(url).get("ip", "")
+
+def mask_proxy(label):
+    # scheme://host:port -> host 打码，给 README 这类公开的地方用；数据库和 CLI 里保留原样
+    if not label or label == "direct": return "direct"
+    u = urlparse(label if "://" in label else f"http://{label}")
+    host = mask_host(u.hostname)
+    return f"{u.scheme}://{f'[{host}]' if ':' in host else host}" + (f":{u.port}" if u.port else "")
+
+def mask_email(email):
+    return f"{email[:3]}***"
+
+def proxy_host(url):
+    # 代理的统一标签 scheme://host:port (补上默认端口，不带账号密码)：日志、指标、历史库、熔断 key 都用它
+    if not url: return "direct"
+    scheme, host, port, _, _ = parse_proxy(url)
+    return f"{scheme}://{host}:{port}"
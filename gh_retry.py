@@ -0,0 +1,110 @@
+##### gh_retry.py 重试 + 熔断 ######
+# RETRY.call("get", key, fn): 按操作类型的策略重试 (指数退避 + full jitter)，key 一般是 "账号|代理"。
+# 同一个 key 连续 BREAKER_FAILS 次操作 (重试用尽后) 失败就熔断 BREAKER_COOLDOWN 秒，期间直接失败不再打请求；冷却后放一次试探。
+# 续期 POST 只在请求肯定没被服务器处理时才重发 (连不上/网关错误)，避免重复续期把成功误报成冷却。
+
+import random, threading, time
+from gh_config import env_int, env_float
+
+RETRY_BASE = env_float("RETRY_BASE", 0.5) #=====退避基数 (秒)，第 n 次重试最多等 base*2^n=====
+BREAKER_FAILS = env_int("BREAKER_FAILS", 3) #=====同一账号+代理连续多少次操作重试用尽仍失败就熔断=====
+BREAKER_COOLDOWN = env_int("BREAKER_COOLDOWN", 120) #=====熔断多少秒后放一次试探=====
+
+class Transient(Exception):
+    # 可以重试的失败 (5xx/429/页面 fetch 失败)；wait 为服务端要求的等待秒数 (Retry-After)
+    def __init__(self, msg, status=None, wait=None):
+        super().__init__(msg)
+        self.status, self.wait = status, wait
+
+class CircuitOpen(Exception):
+    pass
+
+NETWORK = ("ConnectionError", "ConnectTimeout", "ReadTimeout", "ProxyError", "ChunkedEncodingError",
+           "ERR_PROXY", "ERR_TUNNEL", "ERR_SOCKS", "ERR_TIMED_OUT", "ERR_CONNECTION", "ERR_NETWORK", "Failed to fetch")
+NOT_SENT = ("ConnectTimeout", "ProxyError", "ERR_PROXY", "ERR_TUNNEL", "ERR_SOCKS", "ERR_CONNECTION_REFUSED")
+
+def names(e):
+    return f"{' '.join(c.__name__ for c in type(e).__mro__)} {e}"
+
+def idempotent(e):
+    # GET / 页面等待：网络错误、5xx、429、WebDriverWait 超时都值得再来一次
+    return isinstance(e, Transient) or "TimeoutException" in names(e) or any(k in names(e) for k in NETWORK)
+
+def not_processed(e):
+    # POST：只有连不上、或网关/限流明确表示没处理时才重发
+    if isinstance(e, Transient): return e.status in (429, 502, 503, 504)
+    return any(k in names(e) for k in NOT_SENT)
+
+POLICIES = {
+    "get": {"attempts": 4, "cap": 8, "retry": idempotent},
+    "post": {"attempts": 3, "cap": 8, "retry": not_processed},
+    "browser": {"attempts": 3, "cap": 15, "retry": idempotent}, # 启动浏览器 + 登录整段
+    "wait": {"attempts": 2, "cap": 4, "retry": idempotent}, # 页面元素等待，重试前会刷新页面
+}
+
+class Retry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.breakers = {} # key -> [连续失败次数, 熔断到期时间]
+        self.reset()
+
+    def reset(self):
+        with self.lock: self.retries, self.trips, self.fast_fails = {}, 0, 0
+
+    def check(self, key):
+        with self.lock:
+            fails, until = self.breakers.get(key, [0, 0])
+            if until and time.time() < until:
+                self.fast_fails += 1
+                raise CircuitOpen(f"熔断中: {key} 连续失败 {fails} 次，{until - time.time():.0f}s 后再试")
+
+    def ok(self, key):
+        with self.lock: self.breakers.pop(key, None)
+
+    def fail(self, key):
+        with self.lock:
+            b = self.breakers.setdefault(key, [0, 0])
+            b[0] += 1
+            if b[0] >= BREAKER_FAILS:
+                b[1] = time.time() + BREAKER_COOLDOWN; self.trips += 1
+                print(f"🔌 熔断: {key} 连续失败 {b[0]} 次，暂停 {BREAKER_COOLDOWN}s")
+
+    def backoff(self, policy, n, e):
+        wait = getattr(e, "wait", None)
+        if wait is None: wait = random.uniform(0, min(policy["cap"], RETRY_BASE * 2 ** n)) # full jitter
+        return min(wait, policy["cap"] * 4)
+
+    def call(self, op, key, fn, on_error=None):
+        # key 可以是函数 (换代理后 key 会变)；on_error(e) 返回 True 表示已经换了通道 (如代理切换)，立即重试不计退避
+        policy = POLICIES[op]
+        n = 0
+        while True:
+            k = key() if callable(key) else key
+            self.check(k)
+            try:
+                out = fn()
+                self.ok(k)
+                return out
+            except CircuitOpen:
+                raise
+            except Exception as e:
+                if on_error and on_error(e):
+                    self.count(op); continue
+                n += 1
+                if n >= policy["attempts"] or not policy["retry"](e):
+                    self.fail(k); raise
+                wait = self.backoff(policy, n - 1, e)
+                self.count(op)
+                print(f"🔁 {op} 第 {n} 次失败 ({str(e)[:80]})，{wait:.1f}s 后重试")
+                time.sleep(wait)
+
+    def count(self, op):
+        with self.lock: self.retries[op] = self.retries.get(op, 0) + 1
+
+    def summary(self):
+        with self.lock:
+            if not (self.retries or self.trips or self.fast_fails): return ""
+            parts = " · ".join(f"{k} {v}" for k, v in self.retries.items()) or "无"
+            return f"🔁 重试: {parts} | 熔断 {self.trips} 次，快速失败 {self.fast_fails} 次"
+
+RETRY = Retry()
@@ -1,20 +1,75 @@
 ##### greathost.py api后台协议抓取，指定名续期 ######
+# 续期走可插拔策略：api (合同 JSON + POST) / dom (页面点击，见 gh_dom.py)。每账号记录各策略耗时和成功率，
+# 先试又快又可靠的，失败自动退到下一个——站点改了 API 时只是变慢，不会漏续。
 
-import os, re, time, json, requests
+# requests / selenium 都按需导入：配置错误、冷却检查、缓存会话这些路径用不到浏览器，不该为它付导入时间
+
+import time
+STARTUP, _T = [], time.perf_counter() # --profile-startup 的各阶段耗时 (ms)
+
+def mark(stage):
+    global _T
+    now = time.perf_counter(); STARTUP.append((stage, (now - _T) * 1000)); _T = now
+
+import os, re, sys, json, html, heapq, atexit, fnmatch, hashlib, functools, threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from urllib.parse import urljoin
 from zoneinfo import ZoneInfo
-from seleniumwire import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+mark("import 标准库")
+from gh_proxy import chrome_proxy, ProxyPool, proxy_host, mask_email
+from gh_block import enable_perf_log, apply_blocking, block_report
+from gh_metrics import SPANS, span
+from gh_notify import Notifier
+from gh_history import HISTORY, OK_KINDS
+from gh_chrome import WarmChrome, CHROME_ARGS
+from gh_retry import RETRY, Transient
+from gh_config import CONFIG_ERRORS, env_int, env_float
+mark("import gh_* 辅助模块")
+
+webdriver = Options = By = WebDriverWait = EC = gh_dom = None # load_selenium() 之后才有
+
+def load_selenium():
+    # 第一次要开浏览器时才导入 selenium 和 gh_dom (页面点击逻辑)
+    global webdriver, Options, By, WebDriverWait, EC, gh_dom
+    if gh_dom: return
+    with span("import_selenium"):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        import gh_dom
 
 EMAIL = os.getenv("GREATHOST_EMAIL", "")
 PASSWORD = os.getenv("GREATHOST_PASSWORD", "")
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID", "")
-PROXY_URL = os.getenv("PROXY_URL", "") #=====sock5代理可留空=====
-TARGET_NAME = os.getenv("TARGET_NAME", "666") #=====目标服务器名=====
+PROXY_URL = os.getenv("PROXY_URL", "") #=====sock5代理可留空；多个代理用 PROXY_URLS (逗号分隔) 组成代理池=====
+PROXY_MODE = os.getenv("PROXY_MODE", "native") #=====native: Chrome 原生代理 (带认证时走本地转发); wire: 旧的 selenium-wire 中间人代理=====
+TARGET_NAME = os.getenv("TARGET_NAME", "666") #=====目标服务器名，逗号分隔多个，支持通配符 web-*，all 表示全部，first 表示第一台=====
+MAX_WORKERS = env_int("MAX_WORKERS", 4) #=====多服务器并发数 (仅 HTTP 会话通道)=====
+API_MODE = os.getenv("API_MODE", "http") #=====http: 登录后把会话交给 requests 并立即关闭浏览器; browser: 全程浏览器内 fetch=====
+API_BENCH = env_int("API_BENCH", 0) #=====大于0时登录后对两种通道各调用 N 次 /api/servers 做耗时对比=====
+SESSION_FILE = os.getenv("SESSION_FILE", ".gh_session.json") #=====会话缓存文件，按账号保存 cookies，下次运行先校验再决定是否登录=====
+ACCOUNTS_FILE = os.getenv("ACCOUNTS_FILE", "") #=====多账号文件: JSON 列表或每行 email:password，填了就忽略 EMAIL/PASSWORD=====
+ACCOUNT_WORKERS = env_int("ACCOUNT_WORKERS", 4) #=====多账号并发数，浏览器登录阶段共用一个 Chrome 串行执行=====
+HTTP_LOGIN = os.getenv("HTTP_LOGIN", "1") == "1" #=====缓存会话失效时先用纯 HTTP 提交登录表单，碰到 JS 验证/验证码才启动 Chrome=====
+HTTP_UA = os.getenv("HTTP_UA", "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+WARM_CHROME = os.getenv("WARM_CHROME", "0") == "1" #=====常驻 Chrome：每账号固定 profile，远程调试连接，续期之间不关浏览器 (见 gh_chrome.py)=====
+WARM_MAX = env_int("WARM_MAX", 3) #=====常驻模式最多同时留几个账号的 Chrome，超了按最久没用的先关=====
+STRATEGY_ORDER = [x.strip() for x in os.getenv("STRATEGIES", "api,dom").split(",") if x.strip()] #=====续期策略: api (接口) / dom (页面点击)，按历史耗时和成功率自动排序=====
+STRATEGY_PIN = os.getenv("STRATEGY_PIN", "0") == "1" #=====1 = 严格按 STRATEGIES 的顺序尝试，不按统计重排=====
+STRATEGY_FILE = os.getenv("STRATEGY_FILE", ".gh_strategy.json") #=====每账号各策略的耗时/成功率统计=====
+STRATEGY_PROBE = env_int("STRATEGY_PROBE", 21600) #=====连续失败被降级的策略多少秒后重新放到前面试探=====
+DAEMON_STATE = os.getenv("DAEMON_STATE", ".gh_schedule.json") #=====--daemon 模式的队列持久化文件=====
+DAEMON_RETRY = env_int("DAEMON_RETRY", 1800) #=====daemon 模式失败/无法判断时多少秒后重查=====
+DAEMON_DISCOVER = env_int("DAEMON_DISCOVER", 21600) #=====daemon 模式按目标规则 (all/通配符) 重新发现新服务器的间隔 (秒)=====
+MAX_HOURS = 108 # 剩余时长超过这个值视为接近 120h 上限
+BASE_URL = os.getenv("GH_BASE_URL", "https://greathost.es").rstrip("/") #=====站点地址，离线测试时指向 fake_greathost.py=====
+IP_CHECK_URL = os.getenv("IP_CHECK_URL", "https://api.ipify.org?format=json")
+POOL = ProxyPool.from_env(IP_CHECK_URL) # PROXY_URLS/PROXY_URL，健康检测结果缓存在 PROXY_CACHE_FILE，PROXY_TTL 秒内有效
+EGRESS = ThreadPoolExecutor(max_workers=4) # 落地 IP 查询在后台跑，不占浏览器启动/登录的时间
 
 STATUS_MAP = {
     "running": ["🟢", "Running"],
@@ -27,185 +82,1050 @@ STATUS_MAP = {
 def now_shanghai():
     return datetime.now(ZoneInfo("Asia/Shanghai")).strftime('%Y/%m/%d %H:%M:%S')
 
+NOTIFIER = Notifier(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, now=now_shanghai)
+
 def calculate_hours(date_str):
     try:
         if not date_str: return 0
-        clean = re.sub(r'\.\d+Z$', 'Z', date_str)
-        expiry = datetime.fromisoformat(clean.replace('Z', '+00:00'))
+        expiry = parse_date(date_str)
         diff = (expiry - datetime.now(timezone.utc)).total_seconds() / 3600
         return max(0, int(diff))
     except Exception as e:
         print(f"⚠️ 时间解析失败: {e}")
         return 0
 
-def send_notice(kind, fields):
-    titles = {
-        "renew_success": "🎉 <b>GreatHost 续期成功</b>",
-        "maxed_out": "🈵 <b>GreatHost 已达上限</b>",
-        "cooldown": "⏳ <b>GreatHost 还在冷却中</b>",
-        "renew_failed": "⚠️ <b>GreatHost 续期未生效</b>",
-        "error": "🚨 <b>GreatHost 脚本报错</b>"
-    }
+def parse_date(date_str):
+    clean = re.sub(r'\.\d+Z$', 'Z', date_str)
+    return datetime.fromisoformat(clean.replace('Z', '+00:00'))
+
+RENEWAL_FIELDS = ("nextRenewalDate",) # 真实接口 renewalInfo 里确认过的字段 (合同 JSON 的 DEBUG 输出)
+UNKNOWN_FIELDS = set() # 已经打印过的未知字段，每个进程只报一次
+
+def renew_eligibility(info):
+    # 直接用合同 JSON 的 nextRenewalDate 算剩余小时，超过 MAX_HOURS 视为已达上限、不再 POST，省掉合同页渲染。
+    # 接口里没有冷却字段，冷却由续期 POST 返回的 "Wait N minutes" 判断。
+    # 缺 nextRenewalDate 时返回 None，由 get_btn 读页面按钮兜底
+    extra = {k: v for k, v in info.items() if k not in RENEWAL_FIELDS and k not in UNKNOWN_FIELDS}
+    if extra:
+        UNKNOWN_FIELDS.update(extra)
+        print(f"🔎 renewalInfo 里有未使用的字段 (确认含义后可加进 RENEWAL_FIELDS): {str(extra)[:300]}")
+    if not info.get("nextRenewalDate"): return None
+    hours = calculate_hours(info["nextRenewalDate"])
+    return {"hours": hours, "maxed": hours > MAX_HOURS}
+
+TITLES = {
+    "renew_success": "🎉 <b>GreatHost 续期成功</b>",
+    "maxed_out": "🈵 <b>GreatHost 已达上限</b>",
+    "cooldown": "⏳ <b>GreatHost 还在冷却中</b>",
+    "renew_failed": "⚠️ <b>GreatHost 续期未生效</b>",
+    "error": "🚨 <b>GreatHost 脚本报错</b>"
+}
+
+def match_targets(servers, target=TARGET_NAME):
+    pats = [p.strip() for p in target.split(",") if p.strip()]
+    if any(p.lower() == "all" for p in pats): return servers
+    if any(p.lower() == "first" for p in pats): return servers[:1] # 老 DOM 脚本的行为：只处理控制台上第一台
+    return [s for s in servers if any(fnmatch.fnmatchcase(str(s.get("name", "")), p) for p in pats)]
+
+def parse_wait(text):
+    # "Wait 23 minutes" / "Wait 1 hour 5 min" -> 秒；没有单位时按分钟
+    total = 0
+    for n, unit in re.findall(r"(\d+)\s*([a-zA-Z]*)", text or ""):
+        u = unit[:1].lower()
+        total += int(n) * {"d": 86400, "h": 3600, "s": 1}.get(u, 60)
+    return total
+
+def next_eligible(kind, hours, wait_s=0):
+    # 根据本次结果推算下一次值得尝试续期的时间点 (epoch 秒)
+    now = time.time()
+    if kind == "cooldown": return now + max(wait_s, 60) + 30
+    if kind in ("renew_success", "maxed_out") and hours > MAX_HOURS:
+        return now + max((hours - MAX_HOURS) * 3600, DAEMON_RETRY)
+    return now + DAEMON_RETRY
+
+def render_notice(kind, fields):
     body = "\n".join([f"{e} {k}: {v}" for e, k, v in fields])
-    msg = f"{titles.get(kind, '📢 通知')}\n\n{body}\n📅 时间: {now_shanghai()}"
-    
-    if TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID:
+    return f"{TITLES.get(kind, '📢 通知')}\n\n{body}"
+
+def send_notice(kind, fields, footer=""):
+    body = render_notice(kind, fields)
+    deliver(f"{body}\n{footer}📅 时间: {now_shanghai()}", body)
+
+def send_report(results, footer=""):
+    # 单台保持原来的通知格式，多台合并成一条汇总
+    if len(results) == 1: return send_notice(results[0]["kind"], results[0]["fields"], footer)
+    counts = {}
+    for r in results: counts[r["kind"]] = counts.get(r["kind"], 0) + 1
+    head = f"📦 <b>GreatHost 批量续期报告</b> ({len(results)} 台: " + " ".join(f"{TITLES[k].split()[0]}{n}" for k, n in counts.items()) + ")"
+    blocks = "\n\n".join(render_notice(r["kind"], r["fields"]) for r in results)
+    deliver(f"{head}\n\n{blocks}\n\n{footer}📅 时间: {now_shanghai()}", f"{head}\n\n{blocks}")
+
+def timing_footer():
+    lines = [l for l in (SPANS.summary(), RETRY.summary(), gh_dom.saved_report() if gh_dom else "") if l]
+    return "".join(f"{l}\n" for l in lines)
+
+def deliver(msg, status=None):
+    NOTIFIER.put(msg, status) # 只入队，运行结束时 flush_notices 统一发送；status 不含页脚，用来判断 README 要不要重写
+
+def flush_notices():
+    with span("send_notice"):
+        NOTIFIER.flush()
+        HISTORY.render_readme(NOTIFIER.readme)
+
+def record(gh, results):
+    # 每台服务器一行写进历史库；账号级异常没有 name 时记目标规则
+    HISTORY.add([{"run": SPANS.run_id, "account": gh.email, "server": str(r.get("name") or gh.target), "sid": r.get("sid"),
+                  "kind": r["kind"], "proxy": proxy_host(gh.proxy), **r.get("data", {})} for r in results])
+
+CHALLENGE = re.compile(r"cf-challenge|challenge-platform|__cf_chl|Just a moment|Checking your browser|DDoS protection", re.I)
+CAPTCHA = re.compile(r"g-recaptcha|h-captcha|cf-turnstile|data-sitekey", re.I)
+
+def challenged(r):
+    # Cloudflare 之类的 JS 验证页 (拦截状态码 + 特征) / 表单里的验证码组件：只有浏览器过得去
+    return (r.status_code in (403, 429, 503) and bool(CHALLENGE.search(r.text))) or bool(CAPTCHA.search(r.text))
+
+def tag_attr(tag, name):
+    m = re.search(rf'\b{name}\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s>]+))', tag, re.I)
+    return html.unescape(next(g for g in m.groups() if g is not None)) if m else None
+
+def login_form(page):
+    # 找带密码框的 <form>，返回 (action, 隐藏字段)；没有 _token 隐藏字段时用 <meta name="csrf-token"> 补上
+    for m in re.finditer(r"<form\b([^>]*)>(.*?)</form>", page, re.S | re.I):
+        attrs, body = m.groups()
+        inputs = re.findall(r"<input\b[^>]*>", body, re.I)
+        if not any((tag_attr(i, "type") or "").lower() == "password" for i in inputs): continue
+        fields = {}
+        for i in inputs:
+            name, typ = tag_attr(i, "name"), (tag_attr(i, "type") or "text").lower()
+            if name and typ == "hidden": fields[name] = tag_attr(i, "value") or ""
+            elif name and typ == "checkbox" and "remember" in name: fields[name] = tag_attr(i, "value") or "on" # 勾上"记住我"，会话活得更久
+        meta = re.search(r'<meta[^>]+name=["\']csrf-token["\'][^>]*>', page, re.I)
+        if meta and "_token" not in fields: fields["_token"] = tag_attr(meta.group(0), "content") or ""
+        return tag_attr(attrs, "action") or "/login", fields
+    return None
+
+def tree_pids(root=None):
+    # 本进程 + 所有子孙进程 (chromedriver / chrome)，仅 Linux
+    root = root or os.getpid()
+    parents = {}
+    for d in os.listdir("/proc"):
+        if not d.isdigit(): continue
         try:
-            requests.post(
-                f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage",
-                data={"chat_id": TELEGRAM_CHAT_ID, "text": msg, "parse_mode": "HTML"},
-                proxies={"http": None, "https": None}, # <-- 只需要加这一行，强制直连
-                timeout=10 # 稍微增加超时防止网络卡顿
-            )
+            with open(f"/proc/{d}/stat") as f: parents[int(d)] = int(f.read().rsplit(")", 1)[1].split()[1])
         except: pass
+    pids, todo = {root}, [root]
+    while todo:
+        cur = todo.pop()
+        for p, pp in parents.items():
+            if pp == cur and p not in pids: pids.add(p); todo.append(p)
+    return pids
 
+def tree_rss_mb(pid=None):
     try:
-        md = msg.replace("<b>", "**").replace("</b>", "**").replace("<code>", "`").replace("</code>", "`")
-        with open("README.md", "w", encoding="utf-8") as f:
-            f.write(f"# GreatHost 自动续期状态\n\n{md}\n\n> 最近更新: {now_shanghai()}")
-    except: pass
+        total = 0
+        for p in tree_pids(pid):
+            try:
+                with open(f"/proc/{p}/statm") as f: total += int(f.read().split()[1])
+            except: pass
+        return total * os.sysconf("SC_PAGE_SIZE") / 1048576
+    except: return 0.0
 
-class GH:
+def tree_cpu_s(pid=None):
+    # 进程树累计 CPU 时间 (utime + stime)，已退出的子进程不计
+    try:
+        total = 0
+        for p in tree_pids(pid):
+            try:
+                with open(f"/proc/{p}/stat") as f: fs = f.read().rsplit(")", 1)[1].split()
+                total += int(fs[11]) + int(fs[12])
+            except: pass
+        return total / os.sysconf("SC_CLK_TCK")
+    except: return 0.0
+
+class RssSampler(threading.Thread):
+    # 后台采样整棵进程树的内存，记录每个账号在途期间的树峰值；并发账号共用浏览器进程，这不是单账号自己的占用
+    def __init__(self, interval=0.5):
+        super().__init__(daemon=True)
+        self.interval, self.peaks, self.lock, self.stopped = interval, {}, threading.Lock(), threading.Event()
+
+    def track(self, key):
+        with self.lock: self.peaks[key] = tree_rss_mb()
+
+    def untrack(self, key):
+        with self.lock: return max(self.peaks.pop(key, 0), tree_rss_mb())
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            cur = tree_rss_mb()
+            with self.lock:
+                for k in self.peaks: self.peaks[k] = max(self.peaks[k], cur)
+
+    def stop(self):
+        self.stopped.set()
+
+def is_proxy_error(e):
+    # 只认网络层错误，WebDriverWait 超时可能是账号/页面问题，不算代理的锅
+    txt = f"{type(e).__name__} {e}"
+    return any(k in txt for k in ("ProxyError", "ConnectTimeout", "ReadTimeout", "ConnectionError", "SOCKSHTTPSConnectionPool",
+                                  "ERR_PROXY", "ERR_TUNNEL", "ERR_SOCKS", "ERR_TIMED_OUT", "ERR_CONNECTION"))
+
+# 浏览器通道的 fetch (u, m 由调用方定义)：5xx/429 带上 _status，网络失败 (Failed to fetch) 的 _status 为 0
+FETCH_JS = ("fetch(u,{method:m}).then(async r=>{const d=await r.json().catch(()=>({success:false,message:'HTTP '+r.status}));"
+            "if(r.status==429||r.status>=500)d._status=r.status;return d;}).catch(e=>({success:false,message:e.toString(),_status:0}))")
+
+def fetch_checked(res):
+    # 消息和 HTTP 通道一样以 "HTTP <status>" 开头，renew() 靠它判断 POST 是否该回头核对
+    if isinstance(res, dict) and "_status" in res:
+        st, msg = res["_status"], str(res.get("message") or "")
+        raise Transient(f"HTTP {st}: {msg[:80]}" if st else msg, st or None)
+    return res
+
+def new_chrome(proxy=None):
+    load_selenium()
+    opts = Options()
+    for a in CHROME_ARGS: opts.add_argument(a) # 和常驻 Chrome 同一套 (窗口大小/语言，见 gh_chrome.py)
+    enable_perf_log(opts)
+    if proxy and PROXY_MODE == "wire":
+        from seleniumwire import webdriver as wire # 只有旧模式才需要 selenium-wire
+        d = wire.Chrome(options=opts, seleniumwire_options={'proxy': {'http': proxy, 'https': proxy}})
+    else:
+        if proxy: opts.add_argument(f"--proxy-server={chrome_proxy(proxy)}")
+        d = webdriver.Chrome(options=opts)
+    apply_blocking(d)
+    return d
+
+class SharedBrowser:
+    # 多账号共用一个 Chrome，每个账号一个独立的 BrowserContext (cookie/缓存互不可见)
+    # WebDriver 会话同一时间只能执行一条命令流，所以浏览器阶段靠 lock 串行
     def __init__(self):
-        opts = Options()
-        opts.add_argument("--headless=new")
-        opts.add_argument("--no-sandbox")
-        proxy = {'proxy': {'http': PROXY_URL, 'https': PROXY_URL}} if PROXY_URL else None
-        self.d = webdriver.Chrome(options=opts, seleniumwire_options=proxy)
+        self.d = None; self.main = None
+        self.lock = threading.Lock()
+
+    def open_context(self, proxy=None):
+        if not self.d:
+            # 原生模式下代理按 context 设置；wire 模式只能整个浏览器共用第一个账号的代理
+            self.d = new_chrome(proxy if PROXY_MODE == "wire" else None); self.main = self.d.current_window_handle
+        opts = {"proxyServer": chrome_proxy(proxy)} if proxy and PROXY_MODE != "wire" else {}
+        ctx = self.d.execute_cdp_cmd("Target.createBrowserContext", opts)["browserContextId"]
+        tid = self.d.execute_cdp_cmd("Target.createTarget", {"url": "about:blank", "browserContextId": ctx})["targetId"]
+        self.d.switch_to.window(tid)
+        apply_blocking(self.d)
+        return ctx, tid
+
+    def close_context(self, ctx, tid):
+        try: self.d.execute_cdp_cmd("Target.closeTarget", {"targetId": tid})
+        except: pass
+        try: self.d.execute_cdp_cmd("Target.disposeBrowserContext", {"browserContextId": ctx})
+        except: pass
+        self.d.switch_to.window(self.main)
+
+    def quit(self):
+        if self.d: self.d.quit(); self.d = None
+
+WARM = {} # 账号 -> [WarmChrome, driver]，常驻模式下跨续期复用；dict 保持插入顺序，最近用过的挪到末尾
+WARM_BUSY = set() # 正在续期的账号，LRU 淘汰时跳过
+WARM_LOCK = threading.Lock()
+
+def close_warm(wc, d):
+    if d:
+        try: d.quit() # debuggerAddress 连上的会话 quit 只断开 chromedriver，不关浏览器
+        except: pass
+    wc.shutdown()
+
+def evict_warm():
+    # 多账号时每个账号一个常驻 Chrome，超过 WARM_MAX 就把最久没用、且不在续期中的关掉
+    with WARM_LOCK:
+        idle = [e for e in WARM if e not in WARM_BUSY]
+        drop = [(e, WARM.pop(e)) for e in idle[:max(0, len(WARM) - WARM_MAX)]]
+    for email, (wc, d) in drop:
+        print(f"🧹 常驻 Chrome 超过 WARM_MAX={WARM_MAX}，关掉最久没用的 [{mask_email(email)}]")
+        close_warm(wc, d)
+
+def release_warm(email):
+    with WARM_LOCK: WARM_BUSY.discard(email)
+    evict_warm()
+
+def warm_chrome(email, proxy):
+    # 确保该账号的常驻 Chrome 活着并返回连着它的 driver；Chrome 重启过或 driver 断了就重连
+    args = [f"--proxy-server={chrome_proxy(proxy)}"] if proxy else []
+    with WARM_LOCK:
+        ent = WARM.pop(email, None) or [WarmChrome(email, args), None]
+        WARM[email] = ent; WARM_BUSY.add(email)
+    evict_warm()
+    try: return attach_warm(ent, args)
+    except: release_warm(email); raise
+
+def attach_warm(ent, args):
+    wc, d = ent
+    restarted = wc.ensure(args)
+    load_selenium()
+    if d and not restarted:
+        try: d.current_window_handle; return d
+        except: print("💥 driver 连接已断开，重连")
+    if d:
+        try: d.quit()
+        except: pass
+    opts = Options()
+    opts.debugger_address = f"127.0.0.1:{wc.port}"
+    enable_perf_log(opts)
+    ent[1] = d = webdriver.Chrome(options=opts)
+    apply_blocking(d)
+    return d
+
+@atexit.register
+def shutdown_warm():
+    for wc, d in WARM.values(): close_warm(wc, d)
+
+SESSION_LOCK = threading.Lock()
+
+def load_sessions():
+    try:
+        with open(SESSION_FILE, encoding="utf-8") as f: return json.load(f)
+    except: return {}
+
+def save_sessions(data):
+    try:
+        tmp = f"{SESSION_FILE}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f: json.dump(data, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, SESSION_FILE)
+    except Exception as e:
+        print(f"⚠️ 会话缓存写入失败: {e}")
+
+def timed(name):
+    # GH 方法计时，第一个位置参数 (sid) 作为 server 标签
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(self, *a, **kw):
+            with span(name, account=mask_email(self.email), proxy=proxy_host(self.proxy), server=str(a[0]) if a else None):
+                return fn(self, *a, **kw)
+        return wrapper
+    return deco
+
+class GH:
+    def __init__(self, email=EMAIL, password=PASSWORD, target=TARGET_NAME, shared=None):
+        self.email, self.password, self.target = email, password, target
+        self.shared = shared # 多账号模式下的共享浏览器
+        self.d = None; self.w = None; self.ctx = None
+        self.s = None # 交接后的 requests 会话
+        self.servers = None # 校验缓存会话时顺带拿到的 /api/servers
+        self.skip = set() # daemon 模式下已单独排队、这次不用处理的服务器名
+        self.listed = None # 最近一次拿到的账号下全部服务器名 (过滤前)，拿不到列表时为 None
+        self.proxy, self.tried = "", [] # 代理池分配的代理 / 本次已失败的代理
+        self.egress = None # 落地 IP 后台查询 (Future)
+        self.lock = threading.Lock()
+        self.dom_lock = threading.Lock() # dom 策略独占浏览器，HTTP 并发续期时各服务器排队点
+
+    def pick_proxy(self):
+        self.proxy = POOL.pick(exclude=self.tried)
+        if self.proxy: print(f"🧭 [{mask_email(self.email)}] 使用代理 {proxy_host(self.proxy)}")
+        self.egress = EGRESS.submit(POOL.lookup_ip, self.proxy)
+
+    def failover(self, e, used):
+        # 当前代理出网络错误时换池子里下一个；并发线程里别人已经换过就直接重试
+        if not used or not is_proxy_error(e): return False
+        with self.lock:
+            if self.proxy != used: return True
+            POOL.mark_bad(used, e)
+            self.tried.append(used)
+            try: self.pick_proxy()
+            except Exception as ex:
+                print(f"🚨 没有可切换的代理: {ex}")
+                return False
+            if self.s: self.s.proxies = {"http": self.proxy, "https": self.proxy}
+            return True
+
+    @timed("browser_start")
+    def start_browser(self):
+        load_selenium()
+        if self.shared:
+            self.shared.lock.acquire()
+            try: self.ctx = self.shared.open_context(self.proxy)
+            except: self.shared.lock.release(); raise
+            self.d = self.shared.d
+        elif WARM_CHROME:
+            self.d = warm_chrome(self.email, self.proxy)
+        else:
+            self.d = new_chrome(self.proxy)
         self.w = WebDriverWait(self.d, 25)
 
+    def stop_browser(self):
+        if not self.d: return
+        try:
+            block_report(self.d)
+            if self.shared: self.shared.close_context(*self.ctx)
+            elif not WARM_CHROME: self.d.quit() # 常驻模式不关，留给下一次续期
+        finally:
+            if self.shared: self.shared.lock.release()
+            if WARM_CHROME: release_warm(self.email)
+            self.d = None; self.ctx = None
+
+    @property
+    def breaker_key(self):
+        # 每账号+代理一个熔断器：按完整邮箱的哈希区分 (打码后的前 3 位会撞)，日志里仍只露打码形式
+        return f"{mask_email(self.email)}#{hashlib.sha1(self.email.encode()).hexdigest()[:8]}|{proxy_host(self.proxy)}"
+
     def api(self, url, method="GET"):
         print(f"📡 API 调用 [{method}] {url}")
-        script = f"return fetch('{url}',{{method:'{method}'}}).then(r=>r.json()).catch(e=>({{success:false,message:e.toString()}}))"
-        return self.d.execute_script(script)
+        if self.s: return self.http_api(url, method)
+        return self.browser_api(url, method)
+
+    def browser_api(self, url, method, first=None):
+        # first: 批量请求里已经拿到的结果，算第一次尝试；5xx/429/网络失败再按同样的重试策略和熔断单独重来
+        first = [first] if first is not None else []
+        def once():
+            return fetch_checked(first.pop() if first else self.d.execute_script(f"const u=arguments[0],m=arguments[1];return {FETCH_JS}", url, method))
+        try:
+            return RETRY.call("post" if method == "POST" else "get", self.breaker_key, once)
+        except Exception as e:
+            return {"success": False, "message": str(e)}
+
+    def api_batch(self, reqs):
+        # [(url, method), ...] -> [(data, ms), ...]；浏览器通道一次 execute_async_script 内 Promise.all
+        # 每个请求单独 catch，一个接口挂了不影响其它结果
+        for url, method in reqs: print(f"📡 API 批量 [{method}] {url}")
+        if self.s:
+            def one(req):
+                t = time.perf_counter()
+                return self.http_api(*req), (time.perf_counter() - t) * 1000
+            with ThreadPoolExecutor(max_workers=len(reqs)) as ex: return list(ex.map(one, reqs))
+        script = f"""
+            const reqs = arguments[0], done = arguments[arguments.length - 1];
+            Promise.all(reqs.map(([u, m]) => {{
+                const t = performance.now();
+                return {FETCH_JS}.then(d => [d, performance.now() - t]);
+            }})).then(done);
+        """
+        self.d.set_script_timeout(30)
+        out = []
+        for (url, method), (res, ms) in zip(reqs, self.d.execute_async_script(script, [list(r) for r in reqs])):
+            t = time.perf_counter()
+            out.append((self.browser_api(url, method, res), ms + (time.perf_counter() - t) * 1000))
+        return out
+
+    def http_api(self, url, method="GET"):
+        # 与浏览器 fetch 的 catch 行为保持一致：重试用尽后返回 {success:false}
+        used = [self.proxy]
+        def once():
+            used[0] = self.proxy
+            r = self.s.request(method, BASE_URL + url, timeout=20)
+            if r.status_code == 429 or r.status_code >= 500:
+                ra = r.headers.get("Retry-After", "")
+                raise Transient(f"HTTP {r.status_code}: {r.text[:80]}", r.status_code, float(ra) if ra.isdigit() else None)
+            return r.json()
+        def switch(e):
+            # POST 只在请求肯定没发出去 (连不上代理) 时换代理重发
+            import requests
+            resend = method == "GET" or isinstance(e, (requests.exceptions.ProxyError, requests.exceptions.ConnectTimeout))
+            return resend and self.failover(e, used[0])
+        try:
+            return RETRY.call("post" if method == "POST" else "get", lambda: self.breaker_key, once, switch)
+        except Exception as e:
+            return {"success": False, "message": str(e)}
+
+    def new_session(self, ua):
+        import requests # 第一个 HTTP 会话才导入
+        s = requests.Session()
+        s.trust_env = False
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=8) # keep-alive 连接池
+        s.mount("https://", adapter); s.mount("http://", adapter)
+        s.headers.update({
+            "User-Agent": ua,
+            "Accept": "application/json, text/plain, */*",
+            "Referer": f"{BASE_URL}/dashboard"
+        })
+        if self.proxy: s.proxies = {"http": self.proxy, "https": self.proxy}
+        return s
+
+    def make_session(self):
+        s = self.new_session(self.d.execute_script("return navigator.userAgent"))
+        for c in self.d.get_cookies():
+            s.cookies.set(c["name"], c["value"], domain=c.get("domain"), path=c.get("path", "/"), expires=c.get("expiry"))
+        return s
+
+    @timed("restore_session")
+    def restore_session(self):
+        ent = load_sessions().get(self.email)
+        if not ent: return False
+        now = time.time()
+        cookies = [c for c in ent.get("cookies", []) if not c.get("expiry") or c["expiry"] > now]
+        if not cookies:
+            print("🍪 缓存会话已过期，需要重新登录")
+            return False
+        self.s = self.new_session(ent.get("ua") or "Mozilla/5.0")
+        for c in cookies:
+            self.s.cookies.set(c["name"], c["value"], domain=c.get("domain"), path=c.get("path", "/"), expires=c.get("expiry"))
+        def probe():
+            r = self.s.get(BASE_URL + "/api/servers", timeout=20, allow_redirects=False)
+            if r.status_code == 429 or r.status_code >= 500: raise Transient(f"HTTP {r.status_code}", r.status_code) # 服务端抖动不等于会话失效
+            return r
+        try:
+            r = RETRY.call("get", self.breaker_key, probe)
+            if r.status_code == 200:
+                self.servers = r.json()
+                print(f"🍪 复用缓存会话，跳过登录 (上次校验: {int((now - ent.get('validated', now)) / 60)} 分钟前)")
+                self.save_session()
+                return True
+            print(f"🍪 缓存会话失效 (HTTP {r.status_code})，需要重新登录")
+        except Exception as e:
+            print(f"🍪 缓存会话校验失败: {e}")
+        self.s.close(); self.s = None
+        return False
+
+    @timed("http_login")
+    def http_login(self):
+        # 纯 HTTP 登录：GET /login 取隐藏字段 (CSRF token 等)，POST 账号密码，302 到 /dashboard 即成功
+        # 返回 False = 碰到验证/认不出登录页，交给浏览器；账号密码错误直接抛异常，浏览器也救不了
+        s = self.new_session(HTTP_UA)
+        page = {"Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8"}
+        try:
+            r = RETRY.call("get", self.breaker_key, lambda: s.get(f"{BASE_URL}/login", headers=page, timeout=20))
+            form = None if challenged(r) else login_form(r.text)
+            if form:
+                action, fields = form
+                fields.update(email=self.email, password=self.password)
+                page.update(Referer=r.url, Origin=BASE_URL)
+                r = RETRY.call("post", self.breaker_key, lambda: s.post(urljoin(r.url, action), data=fields, headers=page, timeout=20, allow_redirects=False))
+        except Exception as e:
+            print(f"🔑 HTTP 登录请求失败 ({str(e)[:80]})，改用浏览器")
+            s.close(); return False
+        loc = r.headers.get("Location", "")
+        if form and r.status_code in (301, 302, 303) and "/dashboard" in loc:
+            self.s = s; self.save_session()
+            print(f"🔑 HTTP 登录成功: {mask_email(self.email)}，无需启动浏览器")
+            return True
+        s.close()
+        if form and r.status_code in (301, 302, 303) and "/login" in loc and not challenged(r):
+            raise Exception(f"登录失败: 账号或密码错误 ({loc})")
+        why = "检测到 JS 验证/验证码" if challenged(r) else f"登录页无法识别 (HTTP {r.status_code} {loc})"
+        print(f"🧩 {why}，改用浏览器登录")
+        return False
+
+    def save_session(self):
+        if not self.s: return
+        with SESSION_LOCK: # 多账号并发时避免互相覆盖
+            data = load_sessions()
+            data[self.email] = {
+                "ua": self.s.headers.get("User-Agent"),
+                "validated": time.time(),
+                "cookies": [{"name": c.name, "value": c.value, "domain": c.domain, "path": c.path, "expiry": c.expires} for c in self.s.cookies]
+            }
+            save_sessions(data)
+
+    def bench_transports(self, n):
+        s = self.make_session()
+        script = "return fetch('/api/servers').then(r=>r.json()).catch(e=>({success:false}))"
+        t = time.perf_counter()
+        for _ in range(n): self.d.execute_script(script)
+        b = (time.perf_counter() - t) * 1000 / n
+        t = time.perf_counter()
+        for _ in range(n): s.get(BASE_URL + "/api/servers", timeout=20).json()
+        h = (time.perf_counter() - t) * 1000 / n
+        s.close()
+        print(f"⏱️ 通道对比 /api/servers x{n}: 浏览器 {b:.0f}ms/次 | HTTP {h:.0f}ms/次")
+
+    @timed("handoff")
+    def handoff(self):
+        self.s = self.make_session()
+        self.stop_browser()
+        self.save_session()
+        print(f"🔀 已切换到 HTTP 会话 ({len(self.s.cookies)} cookies)，浏览器已关闭")
 
+    @timed("get_ip")
     def get_ip(self):
+        # pick_proxy 时已在后台开查，这里只取结果
         try:
-            self.d.get("https://api.ipify.org?format=json")
-            ip = json.loads(self.d.find_element(By.TAG_NAME, "body").text).get("ip", "Unknown")
+            ip = self.egress.result(timeout=15) or "Unknown"
             print(f"🌐 落地 IP: {ip}")
             return ip
         except:
             print("🌐 落地 IP: 无法获取")
             return "Unknown"
 
+    @timed("login")
     def login(self):
-        print(f"🔑 正在登录: {EMAIL[:3]}***...")
-        self.d.get("https://greathost.es/login")
-        self.w.until(EC.presence_of_element_located((By.NAME, "email"))).send_keys(EMAIL)
-        self.d.find_element(By.NAME, "password").send_keys(PASSWORD)
+        if WARM_CHROME:
+            self.d.get(f"{BASE_URL}/dashboard")
+            if "/dashboard" in self.d.current_url:
+                print(f"♨️ [{mask_email(self.email)}] profile 里的登录态还有效，跳过登录")
+                return
+        print(f"🔑 正在登录: {mask_email(self.email)}...")
+        if "/login" not in self.d.current_url: self.d.get(f"{BASE_URL}/login") # 常驻模式下未登录会被重定向到登录页
+        self.w.until(EC.presence_of_element_located((By.NAME, "email"))).send_keys(self.email)
+        self.d.find_element(By.NAME, "password").send_keys(self.password)
         self.d.find_element(By.CSS_SELECTOR, "button[type='submit']").click()
         self.w.until(EC.url_contains("/dashboard"))
 
-    def get_server(self):
-        servers = self.api("/api/servers").get("servers", [])
-        return next((s for s in servers if s.get("name") == TARGET_NAME), None)
+    def dom_driver(self):
+        # dom 策略要一个登录好的浏览器：HTTP 会话模式下浏览器早关了，重开一个并把会话 cookies 带进去，失效了再登录
+        if not self.d:
+            self.start_browser()
+            if self.s:
+                self.d.get(f"{BASE_URL}/login") # add_cookie 要求当前页面在同一个域名下
+                for c in self.s.cookies:
+                    try: self.d.add_cookie({"name": c.name, "value": c.value, "path": c.path or "/"})
+                    except: pass
+            self.d.get(f"{BASE_URL}/dashboard")
+            if "/dashboard" not in self.d.current_url: self.login()
+            gh_dom.simulate_human(self.d, self.w)
+        return self.d, self.w
 
-    def get_status(self, sid):
-        info = self.api(f"/api/servers/{sid}/information")
+    @timed("get_servers")
+    def get_servers(self):
+        data, self.servers = self.servers or self.api("/api/servers"), None
+        servers = data.get("servers") if isinstance(data, dict) else None
+        if servers is None and "dom" in STRATEGY_ORDER:
+            print(f"🧭 /api/servers 没有返回服务器列表 ({str(data)[:60]})，改从控制台页面读取")
+            with self.dom_lock:
+                d, _ = self.dom_driver() # 先开浏览器 (会导入 gh_dom) 再取 gh_dom.list_servers
+                servers = gh_dom.list_servers(d)
+        if servers is not None: self.listed = [str(s.get("name")) for s in servers]
+        return [s for s in match_targets(servers or [], self.target) if str(s.get("name")) not in self.skip]
+
+    @timed("get_details")
+    def get_details(self, sid, name):
+        # 状态和合同数据合并成一次往返
+        (info, t1), (contract, t2) = self.api_batch([(f"/api/servers/{sid}/information", "GET"), (f"/api/renewal/contracts/{sid}", "GET")])
+        print(f"⏱️ [{name}] 批量请求耗时: information {t1:.0f}ms | contract {t2:.0f}ms")
+        return self.get_status(sid, name, info), self.get_renew_info(sid, contract)
+
+    def get_status(self, sid, name, info=None):
+        if info is None: info = self.api(f"/api/servers/{sid}/information")
         st = info.get("status", "unknown").lower()
-        icon, name = STATUS_MAP.get(st, ["❓", st])
-        print(f"📋 状态核对: {TARGET_NAME} | {icon} {name}")
-        return icon, name
+        icon, st_name = STATUS_MAP.get(st, ["❓", st])
+        print(f"📋 状态核对: {name} | {icon} {st_name}")
+        return icon, st_name
 
-    def get_renew_info(self, sid):
-        data = self.api(f"/api/renewal/contracts/{sid}")
+    def get_renew_info(self, sid, data=None):
+        if data is None: data = self.api(f"/api/renewal/contracts/{sid}")
         print(f"DEBUG: 原始合同数据 -> {str(data)[:100]}...")
         return data.get("contract", {}).get("renewalInfo") or data.get("renewalInfo", {})
 
+    @timed("get_btn")
     def get_btn(self, sid):
-        self.d.get(f"https://greathost.es/contracts/{sid}")
-        btn = self.w.until(EC.presence_of_element_located((By.ID, "renew-free-server-btn")))
-        self.w.until(lambda d: btn.text.strip() != "")
-        
-        btn_text = btn.text.strip()
+        # 按钮文字由前端 JS 填充，HTTP 通道拿到的原始 HTML 里永远是空的：返回 None，由续期 POST 的响应决定结果
+        if self.s: return None
+        def load():
+            # 每次重试都重新打开合同页，前端渲染卡住时刷新往往就好了
+            self.d.get(f"{BASE_URL}/contracts/{sid}")
+            btn = self.w.until(EC.presence_of_element_located((By.ID, "renew-free-server-btn")))
+            self.w.until(lambda d: btn.text.strip() != "")
+            return btn.text.strip()
+        btn_text = RETRY.call("wait", self.breaker_key, load)
         print(f"🔘 按钮状态: '{btn_text}'")
         return btn_text
 
-    def renew(self, sid):
+    @timed("renew")
+    def renew(self, sid, prev=None):
         print(f"🚀 正在执行续期 POST...")
-        return self.api(f"/api/renewal/contracts/{sid}/renew-free", "POST")
+        url = f"/api/renewal/contracts/{sid}/renew-free"
+        res = self.api(url, "POST")
+        # 5xx 时服务器可能已经处理了：先核对合同到期时间，确实没变再重发一次，避免把成功误判/重复续期
+        if res.get("success") or not str(res.get("message", "")).startswith("HTTP 5") or not prev: return res
+        now = self.get_renew_info(sid).get("nextRenewalDate")
+        if now and parse_date(now) > parse_date(prev):
+            print(f"🔎 POST 返回 {res['message'][:8]}，但合同到期时间已后延，按成功处理")
+            return {"success": True, "message": "续期已生效 (5xx 后核对合同确认)", "details": {"nextRenewalDate": now}}
+        RETRY.count("post")
+        print("🔁 续期 POST 服务端错误且合同未变，重发一次")
+        return self.api(url, "POST")
 
     def close(self):
-        self.d.quit()
+        if self.s: self.save_session(); self.s.close()
+        self.stop_browser()
 
-def run():
-    gh = GH()
-    try:
-        ip = gh.get_ip()
-        gh.login()
-        srv = gh.get_server()
-        if not srv: raise Exception(f"未找到服务器 {TARGET_NAME}")
-        sid = srv["id"]
-        print(f"✅ 已锁定目标服务器: {TARGET_NAME} (ID: {sid})")
+def outcome(name, sid, kind, before, after, status, status_disp, msg, ip, wait_s=None, cool=None):
+    # 各策略共用的结果格式：通知字段 + 下次排期 + 历史库的一行
+    fields = [("📛","服务器名称",html.escape(str(name))), ("🆔","ID",f"<code>{html.escape(str(sid))}</code>")]
+    if kind == "cooldown":
+        fields += [("⏳","冷却时间",html.escape(cool or msg)), ("📊","当前累计",f"{before}h"), ("🚀","服务器状态",status_disp)]
+    else:
+        fields += {"renew_success": [("⏰","增加时间",f"{before} ➔ {after}h"), ("🚀","服务器状态",status_disp)],
+                   "maxed_out": [("⏰","剩余时间",f"{after}h"), ("🚀","服务器状态",status_disp)],
+                   "renew_failed": [("🚀","服务器状态",status_disp), ("⏰","剩余时间",f"{before}h")]}[kind]
+        fields += [("💡","提示",html.escape(str(msg))), ("🌐","落地 IP",f"<code>{ip}</code>")]
+    return {"name": name, "sid": sid, "kind": kind, "fields": fields,
+            "next_at": next_eligible(kind, before if kind == "cooldown" else after, wait_s or 0),
+            "data": {"before_h": before, "after_h": after, "status": status, "cooldown_min": wait_s / 60 if wait_s is not None else None, "message": msg, "ip": ip}}
+
+def error_result(name, sid, e, ip):
+    return {"name": name, "sid": sid, "kind": "error", "next_at": next_eligible("error", 0),
+            "fields": [("📛", "服务器名称", html.escape(str(name))), ("🆔", "ID", f"<code>{html.escape(str(sid))}</code>"), ("❌", "故障", f"<code>{html.escape(str(e)[:100])}</code>")],
+            "data": {"before_h": 0, "after_h": 0, "status": "", "cooldown_min": None, "message": str(e)[:200], "ip": ip}}
+
+def api_renew(gh, srv, ip):
+    # api 策略：information + 合同 JSON 判断冷却/上限，再 POST renew-free
+    name, sid = srv.get("name"), srv.get("id")
+    if not sid: raise Exception("服务器列表里没有 ID，API 策略无法续期")
+    (icon, stname), info = gh.get_details(sid, name)
+    status_disp = f"{icon} {stname}"
+
+    before = calculate_hours(info.get("nextRenewalDate"))
 
-        icon, stname = gh.get_status(sid)
-        status_disp = f"{icon} {stname}"
+    elig = renew_eligibility(info)
+    if elig is None:
+        btn = gh.get_btn(sid) or "" # 合同数据缺字段，浏览器通道回退到渲染合同页读按钮；HTTP 通道直接 POST
+    else:
+        btn = "Renew" # 合同数据里没有冷却信息，直接 POST，冷却看返回
+        print(f"🧮 [{name}] 合同数据判定: 剩余 {elig['hours']}h | 上限 {elig['maxed']}")
+    print(f"🔘 [{name}] 按钮状态: '{btn}' | 剩余: {before}h")
 
-        info = gh.get_renew_info(sid)
-        before = calculate_hours(info.get("nextRenewalDate"))
+    if "Wait" in btn:
+        m = re.search(r"Wait\s+(\d+\s+\w+)", btn)
+        return outcome(name, sid, "cooldown", before, before, stname, status_disp, btn, ip, parse_wait(btn), m.group(1) if m else btn)
 
-        btn = gh.get_btn(sid)
-        print(f"🔘 按钮状态: '{btn}' | 剩余: {before}h")
+    if elig and elig["maxed"]:
+        res = {"success": False, "message": "已达上限 (合同数据判定)，跳过续期请求"}
+    else:
+        res = gh.renew(sid, info.get("nextRenewalDate"))
+    ok = res.get("success", False)
+    msg = res.get("message", "无返回消息")
+    after = calculate_hours(res.get("details", {}).get("nextRenewalDate")) if ok else before
+    print(f"📡 [{name}] 续期响应结果: {ok} | Date='{res.get('details',{}).get('nextRenewalDate')}' | Message='{msg}'")
 
+    if not ok and "Wait" in msg:
+        # HTTP 通道读不到前端渲染的按钮文字时，冷却信息只能从 POST 的返回里拿
+        m = re.search(r"Wait\s+(\d+\s+\w+)", msg)
+        return outcome(name, sid, "cooldown", before, before, stname, status_disp, msg, ip, parse_wait(msg), m.group(1) if m else msg)
+    if ok and after > before: kind = "renew_success"
+    elif "5 d" in msg or before > MAX_HOURS: kind = "maxed_out"
+    else: kind = "renew_failed"
+    return outcome(name, sid, kind, before, after, stname, status_disp, msg, ip)
+
+def dom_renew(gh, srv, ip):
+    # dom 策略：控制台 → Billing → View Details → 读累计时间 → 点续期 → 回控制台核对状态 (原 greathost备份.py 的流程)
+    name = srv.get("name")
+    row = None if any(p.strip().lower() == "first" for p in gh.target.split(",")) else name # first: 老脚本的行为，直接点第一台
+    with gh.dom_lock:
+        d, w = gh.dom_driver()
+        sid = gh_dom.go_to_details(d, w, row)
+        sid = srv.get("id") or sid # 从页面读的服务器列表可能没有 ID，用详情页 URL 的末段
+        before, _ = gh_dom.get_hours(d)
+        print(f"🖱️ [{name}] 页面累计时间: {before}h")
+        btn = w.until(EC.presence_of_element_located((By.ID, "renew-free-server-btn"))).get_attribute("innerHTML") or ""
+        btn = re.sub(r"\s+", " ", re.sub(r"<[^>]+>", " ", btn)).strip()
         if "Wait" in btn:
+            final, _ = gh_dom.confirm_and_start(d, w, row)
+            icon, stname = STATUS_MAP.get(final.lower(), ["❓", final])
             m = re.search(r"Wait\s+(\d+\s+\w+)", btn)
-            send_notice("cooldown", [
-                ("📛","服务器名称",TARGET_NAME),
-                ("🆔","ID",f"<code>{sid}</code>"),
-                ("⏳","冷却时间",m.group(1) if m else btn),
-                ("📊","当前累计",f"{before}h"),
-                ("🚀","服务器状态",status_disp)
-            ])
-            return
-
-        res = gh.renew(sid)
-        ok = res.get("success", False)
-        msg = res.get("message", "无返回消息")
-        after = calculate_hours(res.get("details", {}).get("nextRenewalDate")) if ok else before
-        print(f"📡 续期响应结果: {ok} | Date='{res.get('details',{}).get('nextRenewalDate')}' | Message='{msg}'")
-
-        if ok and after > before:
-            send_notice("renew_success", [
-                ("📛","服务器名称",TARGET_NAME),
-                ("🆔","ID",f"<code>{sid}</code>"),
-                ("⏰","增加时间",f"{before} ➔ {after}h"),
-                ("🚀","服务器状态",status_disp),
-                ("💡","提示",msg),
-                ("🌐","落地 IP",f"<code>{ip}</code>")
-            ])
-        elif "5 d" in msg or before > 108:
-            send_notice("maxed_out", [
-                ("📛","服务器名称",TARGET_NAME),
-                ("🆔","ID",f"<code>{sid}</code>"),
-                ("⏰","剩余时间",f"{after}h"),
-                ("🚀","服务器状态",status_disp),
-                ("💡","提示",msg),
-                ("🌐","落地 IP",f"<code>{ip}</code>")
-            ])
-        else:
-            send_notice("renew_failed", [
-                ("📛","服务器名称",TARGET_NAME),
-                ("🆔","ID",f"<code>{sid}</code>"),
-                ("🚀","服务器状态",status_disp),
-                ("⏰","剩余时间",f"{before}h"),
-                ("💡","提示",msg),
-                ("🌐","落地 IP",f"<code>{ip}</code>")
-            ])
+            return outcome(name, sid, "cooldown", before, before, stname, f"{icon} {stname}", btn, ip, parse_wait(btn), m.group(1) if m else btn)
+        err = gh_dom.renew_click(d, w)
+        after, _ = gh_dom.get_hours(d)
+        final, started = gh_dom.confirm_and_start(d, w, row)
+    icon, stname = STATUS_MAP.get(final.lower(), ["❓", final])
+    status_disp = f"✅ 已触发启动 ({icon} {stname})" if started else f"{icon} {stname}"
+    print(f"🖱️ [{name}] 页面续期: {before} ➔ {after}h | 报错: '{err}'")
+    if after > before: return outcome(name, sid, "renew_success", before, after, stname, status_disp, "页面续期成功", ip)
+    if "5 d" in err or (before > MAX_HOURS and after == before):
+        return outcome(name, sid, "maxed_out", before, after, stname, status_disp, err or "已近120h上限，暂无需续期。", ip)
+    return outcome(name, sid, "renew_failed", before, after, stname, status_disp, err or "时间未增加，请手动确认。", ip)
+
+STRATEGIES = {"api": api_renew, "dom": dom_renew}
+PRIOR_MS = {"api": 1000, "dom": 20000} # 还没有统计时的预估耗时
+
+class StrategyStats:
+    # 每账号每策略：次数、成功率和耗时的指数滑动平均、连续失败次数，持久化到 STRATEGY_FILE
+    # 排序键：(连续失败 2 次以上且还在降级期, 平均耗时 / 成功率 = 每跑通一次的期望耗时)
+    def __init__(self, path=STRATEGY_FILE, alpha=0.3):
+        self.path, self.alpha = path, alpha
+        self.lock = threading.Lock()
+        try:
+            with open(path, encoding="utf-8") as f: self.data = json.load(f)
+        except: self.data = {}
+
+    def order(self, email, names):
+        if STRATEGY_PIN: return list(names)
+        st, now = self.data.get(email, {}), time.time()
+        def key(n):
+            s = st.get(n, {})
+            broken = s.get("fails", 0) >= 2 and now - s.get("last_fail", 0) < STRATEGY_PROBE
+            return (broken, s.get("ms", PRIOR_MS.get(n, 5000)) / max(s.get("ok", 1.0), 0.05))
+        return sorted(names, key=key)
+
+    def add(self, email, name, ok, ms):
+        with self.lock:
+            s = self.data.setdefault(email, {}).setdefault(name, {"n": 0, "ok": 1.0, "ms": PRIOR_MS.get(name, 5000), "fails": 0})
+            s["n"] += 1
+            s["ok"] = round(s["ok"] + self.alpha * (ok - s["ok"]), 3)
+            if ok: s["ms"], s["fails"] = round(s["ms"] + self.alpha * (ms - s["ms"])), 0 # 失败往往很快，不计入耗时
+            else: s["fails"] += 1; s["last_fail"] = time.time()
+            try:
+                tmp = f"{self.path}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f: json.dump(self.data, f, ensure_ascii=False, indent=1)
+                os.replace(tmp, self.path)
+            except Exception as e:
+                print(f"⚠️ 策略统计写入失败: {e}")
+
+STRATEGY_STATS = StrategyStats()
+
+def renew_server(gh, srv, ip):
+    # 按统计排好的顺序逐个策略尝试，流程跑通 (续上/冷却/上限) 就停；都没跑通时报最有信息量的那个结果
+    name = srv.get("name")
+    print(f"✅ 处理服务器: {name} (ID: {srv.get('id')})")
+    best, path = None, []
+    for n in STRATEGY_STATS.order(gh.email, [x for x in STRATEGY_ORDER if x in STRATEGIES]):
+        t = time.perf_counter()
+        try:
+            with span(f"strategy_{n}", account=mask_email(gh.email), proxy=proxy_host(gh.proxy), server=str(name)):
+                r = STRATEGIES[n](gh, srv, ip)
+            ok = r["kind"] in OK_KINDS
+        except Exception as e:
+            print(f"🚨 [{name}] 策略 {n} 异常: {e}")
+            r, ok = error_result(name, srv.get("id"), e, ip), False
+        STRATEGY_STATS.add(gh.email, n, ok, (time.perf_counter() - t) * 1000)
+        path.append(f"{n} {'✅' if ok else '❌'}")
+        if best is None or ok or r["kind"] != "error": best = r
+        if ok: break
+        print(f"🧭 [{name}] 策略 {n} 未跑通 ({r['kind']})，尝试下一个")
+    if best is None: return error_result(name, srv.get("id"), f"没有可用的续期策略: {STRATEGY_ORDER}", ip)
+    if len(path) > 1: best["fields"].append(("🧭", "续期策略", " → ".join(path)))
+    return best
+
+def process_account(gh):
+    gh.pick_proxy()
+    if not (API_MODE == "http" and (gh.restore_session() or (HTTP_LOGIN and gh.http_login()))):
+        def browser_phase():
+            try:
+                gh.start_browser()
+                gh.login()
+            except:
+                gh.stop_browser(); raise
+        def switch(e):
+            if not gh.failover(e, gh.proxy): return False
+            print(f"🔁 浏览器阶段代理故障，换 {proxy_host(gh.proxy)} 重试")
+            return True
+        RETRY.call("browser", lambda: gh.breaker_key, browser_phase, switch)
+        if API_MODE == "http":
+            if API_BENCH > 0: gh.bench_transports(API_BENCH)
+            gh.handoff()
+    targets = gh.get_servers()
+    if not targets:
+        if gh.skip: print("🔎 没有发现新服务器"); return [] # daemon 重新发现：匹配到的都已在队列里
+        raise Exception(f"未找到服务器 {gh.target}")
+    print(f"✅ 已锁定目标服务器 {len(targets)} 台: {', '.join(str(s.get('name')) for s in targets)}")
+    ip = gh.get_ip()
+
+    # 浏览器通道共用一个 driver，只能串行；HTTP 会话可以并发
+    workers = min(MAX_WORKERS, len(targets)) if gh.s else 1
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+        return list(ex.map(lambda srv: renew_server(gh, srv, ip), targets))
+
+def run():
+    gh = GH()
+    try:
+        results = process_account(gh)
+        record(gh, results)
+        send_report(results, timing_footer())
     except Exception as e:
         print(f"🚨 运行异常: {e}")
+        record(gh, [{"kind": "error", "data": {"message": str(e)[:200]}}])
         # 因为 send_notice 内部已经强制直连，所以这里直接调就行，代码清爽多了
         send_notice("error", [
             ("📛", "服务器名称", TARGET_NAME),
-            ("❌", "故障", f"<code>{str(e)[:100]}</code>"),
+            ("❌", "故障", f"<code>{html.escape(str(e)[:100])}</code>"),
             ("🌐", "代理状态", "已尝试直连") 
-        ])
+        ], timing_footer())
 
     finally:
         # 增加一个判断，防止 gh 没初始化成功导致报错
         if 'gh' in locals():
             try: gh.close()
             except: pass
+        flush_notices()
+        print(SPANS.summary())
+        SPANS.export()
+
+def load_accounts(path):
+    with open(path, encoding="utf-8") as f: raw = f.read()
+    if raw.lstrip().startswith("["): return json.loads(raw)
+    accounts = []
+    for line in raw.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#") or ":" not in line: continue
+        email, password = line.split(":", 1)
+        accounts.append({"email": email.strip(), "password": password.strip()})
+    return accounts
+
+def run_accounts():
+    accounts = load_accounts(ACCOUNTS_FILE)
+    print(f"👥 多账号模式: {len(accounts)} 个账号，并发 {ACCOUNT_WORKERS}")
+    # 常驻模式每个账号有自己的 profile，不能再挤在一个 Chrome 的临时 context 里
+    shared, sampler, stats = (None if WARM_CHROME else SharedBrowser()), RssSampler(), {}
+    sampler.start()
+
+    def one(acct):
+        email = acct["email"]
+        gh = GH(email, acct["password"], acct.get("target") or TARGET_NAME, shared)
+        sampler.track(email); t = time.perf_counter()
+        try:
+            results = process_account(gh)
+        except Exception as e:
+            print(f"🚨 [{mask_email(email)}] 运行异常: {e}")
+            results = [{"kind": "error", "fields": [("📛", "服务器名称", gh.target), ("❌", "故障", f"<code>{html.escape(str(e)[:100])}</code>")],
+                        "data": {"message": str(e)[:200]}}]
+        finally:
+            try: gh.close()
+            except: pass
+        stats[email] = (time.perf_counter() - t, sampler.untrack(email))
+        record(gh, results)
+        for r in results: r["fields"].insert(0, ("👤", "账号", mask_email(email)))
+        return results
+
+    t = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, ACCOUNT_WORKERS)) as ex:
+            results = [r for rs in ex.map(one, accounts) for r in rs]
+    finally:
+        if shared: shared.quit()
+        sampler.stop()
+    lines = [f"👤 {mask_email(e)}: {w:.1f}s | 进程树峰值 {m:.0f}MB" for e, (w, m) in stats.items()]
+    if ACCOUNT_WORKERS > 1: lines.append("ℹ️ 进程树峰值 = 该账号运行期间本进程+浏览器的总内存峰值，并发账号会看到同一个峰值")
+    print("📈 账号资源统计:\n" + "\n".join(lines) + f"\n⏱️ 总耗时 {time.perf_counter() - t:.1f}s")
+    send_report(results, "📈 <b>资源统计</b>\n" + "\n".join(lines) + "\n" + timing_footer())
+    flush_notices()
+    SPANS.export()
+
+def load_schedule():
+    try:
+        with open(DAEMON_STATE, encoding="utf-8") as f: return json.load(f)
+    except: return {}
+
+def save_schedule(state):
+    try:
+        tmp = f"{DAEMON_STATE}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f: json.dump(state, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, DAEMON_STATE)
+    except Exception as e:
+        print(f"⚠️ 队列状态写入失败: {e}")
+
+def drop_gone(state, email, rule, listed):
+    # 拿到了完整的服务器列表时，账号下已经不存在 (被删/改名) 的排队项直接删掉，不再每 DAEMON_RETRY 秒重查报错
+    if listed is None: return set()
+    have = [{"name": n} for n in listed]
+    gone = {k for k in state if k.startswith(email + "\t") and k != f"{email}\t{rule}" and not match_targets(have, k.split("\t", 1)[1])}
+    for k in gone:
+        state.pop(k); name = k.split("\t", 1)[1]
+        print(f"🗑️ [{mask_email(email)}] 服务器 {name} 已不在账号下，移出队列")
+    return gone
+
+def run_daemon():
+    # 常驻模式：按 (账号, 服务器, 下次可续期时间) 排队，睡到最早的时间点再处理
+    # 每个账号的目标规则 (可能是通配符/all) 本身也是一个排队项，每 DAEMON_DISCOVER 秒重新发现一次新加的服务器
+    accounts = load_accounts(ACCOUNTS_FILE) if ACCOUNTS_FILE else [{"email": EMAIL, "password": PASSWORD}]
+    creds = {a["email"]: a for a in accounts}
+    rules = {email: a.get("target") or TARGET_NAME for email, a in creds.items()}
+    state = {}
+    for k, v in load_schedule().items():
+        email, name = k.split("\t", 1)
+        # 账号被删了、或改了目标规则后不再匹配的服务器 (包括旧规则本身) 直接丢掉
+        if email in rules and (name == rules[email] or match_targets([{"name": name}], rules[email])): state[k] = v
+    for email, rule in rules.items(): state.setdefault(f"{email}\t{rule}", time.time())
+    save_schedule(state)
+    heap = [(t, k) for k, t in state.items()]
+    heapq.heapify(heap)
+    print(f"🕰️ 常驻模式启动: {len(creds)} 个账号，{len(state)} 个排队项")
+
+    while heap:
+        t, key = heap[0]
+        if state.get(key) != t: heapq.heappop(heap); continue # 已被重新排期的旧条目
+        wait = t - time.time()
+        if wait > 0:
+            email, name = key.split("\t", 1)
+            print(f"💤 下一个: {mask_email(email)} / {name} @ {datetime.fromtimestamp(t, ZoneInfo('Asia/Shanghai')).strftime('%m/%d %H:%M:%S')} ({wait / 60:.1f} 分钟后)")
+            time.sleep(wait)
+
+        # 同一账号里同时到期 (60s 内) 的服务器合并成一次登录处理
+        due = {}
+        while heap and heap[0][0] <= time.time() + 60:
+            t, key = heapq.heappop(heap)
+            if state.get(key) != t: continue
+            email, name = key.split("\t", 1)
+            due.setdefault(email, []).append(name)
+
+        results = []
+        SPANS.reset(); RETRY.reset()
+        for email, names in due.items():
+            a, rule = creds[email], rules[email]
+            gh = GH(email, a["password"], ",".join(names))
+            if rule in names: # 重新发现时跳过已经单独排队的服务器
+                gh.skip = {k.split("\t", 1)[1] for k in state if k.startswith(email + "\t")} - set(names)
+            updates = {}
+            try:
+                rs = process_account(gh)
+                for r in rs: updates[f"{email}\t{r['name']}"] = r["next_at"]
+                got = [{"name": r["name"]} for r in rs]
+                for n in names: # 规则一个都没匹配上 (服务器被删/改名) 的稍后再查
+                    if n != rule and not match_targets(got, n): updates[f"{email}\t{n}"] = time.time() + DAEMON_RETRY
+                if rule in names: updates.setdefault(f"{email}\t{rule}", time.time() + DAEMON_DISCOVER)
+            except Exception as e:
+                print(f"🚨 [{mask_email(email)}] 运行异常: {e}")
+                rs = [{"kind": "error", "fields": [("📛", "服务器名称", ",".join(names)), ("❌", "故障", f"<code>{html.escape(str(e)[:100])}</code>")],
+                       "data": {"message": str(e)[:200]}}]
+                for n in names: updates[f"{email}\t{n}"] = time.time() + DAEMON_RETRY
+            finally:
+                try: gh.close()
+                except: pass
+            gone = drop_gone(state, email, rule, gh.listed)
+            for k in gone: updates.pop(k, None)
+            if all(f"{email}\t{n}" in gone for n in names): rs = [] # 到期的都已不存在，不再报 "未找到服务器"
+            record(gh, rs)
+            for k, v in updates.items():
+                state[k] = v; heapq.heappush(heap, (v, k))
+            if len(creds) > 1:
+                for r in rs: r["fields"].insert(0, ("👤", "账号", mask_email(email)))
+            results += rs
+        save_schedule(state)
+        if results: send_report(results, timing_footer())
+        HISTORY.render_readme(NOTIFIER.readme)
+        NOTIFIER.flush_async() # 发送不阻塞调度循环
+        SPANS.export()
+
+mark("模块初始化 (配置/代理缓存/策略统计)")
+
+def check_config():
+    # 在导入 selenium、启动 Chrome 之前把配置问题一次性找出来
+    env_float("JITTER_BUDGET", 0) # gh_dom 按需导入，它的数值配置在这里先校验
+    errs = list(CONFIG_ERRORS)
+    if ACCOUNTS_FILE:
+        try:
+            accts = load_accounts(ACCOUNTS_FILE)
+            if not accts: errs.append(f"ACCOUNTS_FILE {ACCOUNTS_FILE} 里没有账号")
+            errs += [f"ACCOUNTS_FILE 第 {i + 1} 个账号缺少 email/password" for i, a in enumerate(accts) if not (a.get("email") and a.get("password"))]
+        except Exception as e:
+            errs.append(f"ACCOUNTS_FILE 读取失败: {e}")
+    elif not (EMAIL and PASSWORD):
+        errs.append("未设置 GREATHOST_EMAIL / GREATHOST_PASSWORD")
+    if API_MODE not in ("http", "browser"): errs.append(f"API_MODE={API_MODE!r} 只能是 http / browser")
+    if PROXY_MODE not in ("native", "wire"): errs.append(f"PROXY_MODE={PROXY_MODE!r} 只能是 native / wire")
+    unknown = [x for x in STRATEGY_ORDER if x not in STRATEGIES]
+    if unknown or not STRATEGY_ORDER: errs.append(f"STRATEGIES 有未知策略 {unknown or '(空)'}，可选: {','.join(STRATEGIES)}")
+    if not TARGET_NAME.strip(): errs.append("TARGET_NAME 为空")
+    return errs
+
+def profile_startup():
+    # python greathost.py --profile-startup: 打印各启动阶段耗时，按需导入的依赖也单独量一次，不执行续期
+    lazy = len(STARTUP)
+    check_config(); mark("check_config")
+    import requests; mark("import requests (按需: HTTP 会话/登录)")
+    load_selenium(); mark("import selenium + gh_dom (按需: 开浏览器时)")
+    print("🚀 启动耗时 (⏳ = 按需导入，只有用到时才付):")
+    for i, (n, ms) in enumerate(STARTUP):
+        print(f"  {ms:>8.1f}ms  {'⏳ ' if i > lazy else ''}{n}")
+    print(f"  {sum(ms for _, ms in STARTUP[:lazy + 1]):>8.1f}ms  启动合计 (不含按需导入)")
+
+def exit_on_config_errors():
+    errs = check_config()
+    if errs:
+        for e in errs: print(f"🚨 配置错误: {e}")
+        send_notice("error", [("❌", "配置错误", "<code>" + html.escape("; ".join(errs)[:300]) + "</code>")])
+        NOTIFIER.flush()
+        sys.exit(2)
+
+def main():
+    if "--profile-startup" in sys.argv: return profile_startup()
+    exit_on_config_errors()
+    if "--daemon" in sys.argv: run_daemon()
+    elif ACCOUNTS_FILE: run_accounts()
+    else: run()
 
 if __name__ == "__main__":
-    run()
+    main()
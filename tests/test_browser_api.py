@@ -0,0 +1,53 @@
+import pytest
+
+import greathost as gh
+from gh_retry import RETRY, BREAKER_FAILS
+
+class StubDriver:
+    # 浏览器通道只用到 execute_script / execute_async_script；replies 依次作为单次 fetch 的结果
+    def __init__(self, batch, replies=()):
+        self.batch, self.replies, self.calls = batch, list(replies), []
+
+    def set_script_timeout(self, s):
+        pass
+
+    def execute_async_script(self, script, reqs):
+        return self.batch
+
+    def execute_script(self, script, url, method):
+        self.calls.append((url, method))
+        return self.replies.pop(0)
+
+@pytest.fixture
+def g(monkeypatch):
+    monkeypatch.setattr("gh_retry.time.sleep", lambda s: None)
+    RETRY.breakers.clear(); RETRY.reset()
+    o = gh.GH("a@b.c", "pw")
+    yield o
+    RETRY.breakers.clear()
+
+def test_batch_retries_5xx_entry(g):
+    g.d = StubDriver([[{"success": True, "id": 1}, 5], [{"message": "boom", "_status": 503}, 7]], [{"success": True, "id": 2}])
+    out = g.api_batch([("/api/a", "GET"), ("/api/b", "GET")])
+    assert [d for d, ms in out] == [{"success": True, "id": 1}, {"success": True, "id": 2}]
+    assert g.d.calls == [("/api/b", "GET")] # 只有失败的那条单独重来
+    assert RETRY.retries == {"get": 1}
+
+def test_batch_failures_trip_breaker(g):
+    fail = {"message": "Failed to fetch", "_status": 0}
+    g.d = StubDriver([[fail, 1]] * BREAKER_FAILS, [fail] * 20)
+    out = g.api_batch([("/api/x", "GET")] * BREAKER_FAILS)
+    assert all(d["success"] is False for d, ms in out)
+    assert RETRY.trips == 1
+    assert "熔断中" in g.api("/api/x")["message"]
+
+def test_browser_message_matches_http_transport(g):
+    g.d = StubDriver([], [{"success": False, "message": "Internal error", "_status": 500}])
+    res = g.api("/api/servers/srv-1/renew-free", "POST") # 500 的 POST 不重发
+    assert res["message"].startswith("HTTP 500")
+    assert len(g.d.calls) == 1
+
+def test_breaker_is_per_account():
+    a, b = gh.GH("abc.one@example.com", "pw"), gh.GH("abc.two@example.com", "pw")
+    assert a.breaker_key != b.breaker_key
+    assert "abc.one" not in a.breaker_key # 日志里会打印 key，不能露完整邮箱
@@ -0,0 +1,55 @@
+# run_daemon 的排队逻辑：process_account 换成桩，循环第一次睡眠时抛异常结束，然后读回持久化的队列
+import time
+
+import pytest
+
+import greathost as gh
+
+class Stop(Exception):
+    pass
+
+@pytest.fixture
+def daemon(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(gh, "EMAIL", "a@b.c"); monkeypatch.setattr(gh, "PASSWORD", "pw"); monkeypatch.setattr(gh, "ACCOUNTS_FILE", "")
+    monkeypatch.setattr(gh.HISTORY, "path", ""); monkeypatch.setattr(gh.NOTIFIER, "token", "")
+    def sleep(s): raise Stop()
+    monkeypatch.setattr(gh.time, "sleep", sleep)
+    calls = []
+    def start(rule, servers, queued, listed=True):
+        # servers: 账号下现有的服务器名；queued: 启动前队列里的 {名字: 到期时间}；listed=False 模拟拿不到服务器列表
+        monkeypatch.setattr(gh, "TARGET_NAME", rule)
+        gh.save_schedule({f"a@b.c\t{n}": t for n, t in queued.items()})
+        def process_account(g):
+            calls.append(g.target)
+            if not listed: raise Exception("网络错误")
+            g.listed = list(servers)
+            hits = [s["name"] for s in gh.match_targets([{"name": n} for n in servers], g.target) if s["name"] not in g.skip]
+            if not hits and not g.skip: raise Exception(f"未找到服务器 {g.target}")
+            return [{"name": n, "kind": "cooldown", "fields": [], "next_at": time.time() + 3600} for n in hits]
+        monkeypatch.setattr(gh, "process_account", process_account)
+        with pytest.raises(Stop): gh.run_daemon()
+        return {k.split("\t", 1)[1]: t for k, t in gh.load_schedule().items()}
+    start.calls = calls
+    return start
+
+def test_startup_prunes_names_the_rule_no_longer_matches(daemon):
+    later = time.time() + 3600
+    assert set(daemon("666*", ["666", "666-2"], {"666": later, "web": later, "all": later})) == {"666*", "666", "666-2"}
+    assert daemon.calls == ["666*"] # 旧规则 all 和不再匹配的 web 丢掉；新规则立即重新发现，666 已排队不重复处理
+
+def test_rediscovery_drops_deleted_server(daemon):
+    q = daemon("all", ["666"], {"all": 0, "gone-server": time.time() + 3600})
+    assert set(q) == {"all", "666"}
+    assert q["all"] > time.time() + gh.DAEMON_DISCOVER - 60
+
+def test_due_deleted_server_is_dropped_not_retried(daemon, capsys):
+    assert set(daemon("all", ["666"], {"all": time.time() + 3600, "gone-server": 0})) == {"all"}
+    assert daemon.calls == ["gone-server"]
+    assert "gone-server 已不在账号下" in capsys.readouterr().out
+
+def test_lookup_without_server_list_is_retried(daemon):
+    # 拿不到服务器列表时不能断定服务器没了，按 DAEMON_RETRY 重查
+    q = daemon("all", [], {"all": time.time() + 7200, "666": 0}, listed=False)
+    assert set(q) == {"all", "666"}
+    assert abs(q["666"] - (time.time() + gh.DAEMON_RETRY)) < 60
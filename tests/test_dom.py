@@ -0,0 +1,36 @@
+import gh_dom
+
+class StubDriver:
+    # rows: 页面上能按名字找到的服务器行；billing: Billing 按钮个数
+    def __init__(self, rows, billing):
+        self.rows, self.billing = rows, billing
+
+    def find_element(self, by, value):
+        return object()
+
+    def find_elements(self, by, value):
+        if "server-name" in value: return [object()] if any(f'"{n}"' in value for n in self.rows) else []
+        return [object()] * self.billing
+
+class StubWait:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def until(self, cond):
+        return cond(self.driver)
+
+def scope(rows, billing, name):
+    d = StubDriver(rows, billing)
+    return gh_dom.scope(d, StubWait(d), name)
+
+def test_scope_by_row_name():
+    assert scope(["666", "web"], 2, "web") == "web"
+
+def test_scope_falls_back_to_first_on_single_server():
+    assert scope([], 1, "666") is None # 老页面结构没有 .server-name
+
+def test_scope_keeps_name_when_ambiguous():
+    assert scope([], 3, "666") == "666" # 多台又认不出是哪一行时不能随便点第一台
+
+def test_first_mode_is_unscoped():
+    assert scope(["666"], 2, None) is None
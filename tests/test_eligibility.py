@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta, timezone
+
+import greathost as gh
+
+def expiry(hours):
+    return (datetime.now(timezone.utc) + timedelta(hours=hours, minutes=30)).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+class StubGH:
+    # api_renew 只用到这三个方法
+    def __init__(self, info, res):
+        self.info, self.res, self.posts = info, res, 0
+
+    def get_details(self, sid, name):
+        return ("🟢", "Running"), self.info
+
+    def get_btn(self, sid):
+        return None
+
+    def renew(self, sid, prev=None):
+        self.posts += 1
+        return self.res
+
+def test_missing_field_falls_back_to_page(capsys):
+    gh.UNKNOWN_FIELDS.clear()
+    assert gh.renew_eligibility({}) is None
+    assert gh.renew_eligibility({"foo": 1}) is None
+    assert gh.renew_eligibility({"foo": 2}) is None
+    assert capsys.readouterr().out.count("未使用的字段") == 1 # 同一个未知字段只报一次
+
+def test_hours_below_cap():
+    e = gh.renew_eligibility({"nextRenewalDate": expiry(50)})
+    assert e == {"hours": 50, "maxed": False}
+
+def test_cap_uses_max_hours():
+    assert gh.renew_eligibility({"nextRenewalDate": expiry(gh.MAX_HOURS)})["maxed"] is False
+    assert gh.renew_eligibility({"nextRenewalDate": expiry(gh.MAX_HOURS + 1)})["maxed"] is True
+
+def test_cap_skips_post():
+    stub = StubGH({"nextRenewalDate": expiry(115)}, {"success": True})
+    r = gh.api_renew(stub, {"name": "666", "id": "srv-1"}, "1.2.3.4")
+    assert r["kind"] == "maxed_out" and stub.posts == 0
+
+def test_cooldown_from_post_response():
+    stub = StubGH({"nextRenewalDate": expiry(50)}, {"success": False, "message": "Wait 23 minutes"})
+    r = gh.api_renew(stub, {"name": "666", "id": "srv-1"}, "1.2.3.4")
+    assert r["kind"] == "cooldown" and stub.posts == 1
+    assert r["data"]["cooldown_min"] == 23 and r["data"]["before_h"] == 50
+
+def test_renew_success():
+    stub = StubGH({"nextRenewalDate": expiry(50)}, {"success": True, "message": "ok", "details": {"nextRenewalDate": expiry(62)}})
+    r = gh.api_renew(stub, {"name": "666", "id": "srv-1"}, "1.2.3.4")
+    assert r["kind"] == "renew_success" and r["data"]["after_h"] == 62
@@ -0,0 +1,70 @@
+# 端到端：起 fake_greathost，把 greathost.py 当子进程跑 (模块级配置都从环境变量读)，按历史库和服务端命中次数断言结果
+# 只用 api 策略，不依赖本机有没有 Chrome
+import os, subprocess, sys
+
+import pytest
+
+import fake_greathost
+from gh_history import History
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def site(tmp_path):
+    servers = []
+    def start(*argv):
+        args = fake_greathost.build_parser().parse_args(["--port", "0", *argv])
+        srv, url = fake_greathost.start(args)
+        servers.append(srv)
+        def run(**env):
+            full = dict(os.environ, GH_BASE_URL=url, IP_CHECK_URL=f"{url}/ip", GREATHOST_EMAIL=args.email, GREATHOST_PASSWORD=args.password,
+                        PROXY_URLS="", TELEGRAM_BOT_TOKEN="", TARGET_NAME="all", STRATEGIES="api", RETRY_BASE="0.01")
+            full.update(env)
+            p = subprocess.run([sys.executable, os.path.join(ROOT, "greathost.py")], cwd=tmp_path, env=full, capture_output=True, text=True, timeout=120)
+            rows = History(str(tmp_path / ".gh_history.db")).query("SELECT server, kind, message FROM renewals ORDER BY id")
+            return p.stdout, [dict(r) for r in rows]
+        return srv.state, run
+    yield start
+    for srv in servers: srv.shutdown()
+
+def test_api_flow_then_cooldown(site):
+    st, run = site("--servers", "2")
+    out, rows = run()
+    assert "HTTP 登录成功" in out
+    assert sorted((r["server"], r["kind"]) for r in rows) == [("666", "renew_success"), ("666-2", "renew_success")]
+    assert not any(k.startswith("GET /contracts") for k in st.hits) # HTTP 通道不打合同页
+    out, rows = run()
+    assert [r["kind"] for r in rows[2:]] == ["cooldown", "cooldown"]
+    assert st.hits["POST /login"] == 1 # 第二次复用缓存会话
+
+def test_initial_cooldown(site):
+    st, run = site("--cooldown", "20")
+    out, rows = run()
+    assert [r["kind"] for r in rows] == ["cooldown"]
+    assert "Wait 20 minutes" in out
+
+def test_cap_skips_post(site):
+    st, run = site("--hours", "115")
+    out, rows = run()
+    assert [r["kind"] for r in rows] == ["maxed_out"]
+    assert "POST /api/renewal/contracts/srv-0001/renew-free" not in st.hits
+
+def test_5xx_on_post_is_verified_not_blindly_retried(site):
+    st, run = site("--error-rate", "1", "--error-paths", "renew-free$")
+    out, rows = run()
+    assert [r["kind"] for r in rows] == ["renew_failed"]
+    assert "合同未变" in out
+    assert st.hits["POST /api/renewal/contracts/srv-0001/renew-free"] == 2 # 核对合同没变才重发一次
+
+def test_wrong_password(site):
+    st, run = site()
+    out, rows = run(GREATHOST_PASSWORD="nope")
+    assert "账号或密码错误" in out
+    assert [r["kind"] for r in rows] == ["error"]
+    assert not any(k.startswith("GET /api/") for k in st.hits)
+
+def test_challenge_falls_back_to_browser(site):
+    st, run = site("--challenge")
+    out, rows = run()
+    assert "检测到 JS 验证" in out
+    assert "POST /login" not in st.hits # 纯 HTTP 过不了验证页，不该硬提交表单
@@ -0,0 +1,12 @@
+from gh_history import History
+
+def test_readme_masks_proxy(tmp_path):
+    h = History(str(tmp_path / "h.db"))
+    h.add([{"account": "alice@example.com", "server": "666", "kind": "renew_success", "before_h": 50, "after_h": 62,
+            "proxy": "socks5://203.0.113.7:1080", "ip": "203.0.113.7"}])
+    readme = tmp_path / "README.md"
+    h.render_readme(str(readme))
+    text = readme.read_text(encoding="utf-8")
+    assert "socks5://203.0.***.7:1080" in text
+    assert "203.0.113.7" not in text and "alice@example.com" not in text
+    assert h.query("SELECT proxy FROM renewals")[0]["proxy"] == "socks5://203.0.113.7:1080" # 数据库里保留原样
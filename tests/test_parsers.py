@@ -0,0 +1,44 @@
+import greathost as gh
+from gh_notify import chunks, split_message
+
+def test_parse_wait():
+    assert gh.parse_wait("Wait 23 minutes") == 23 * 60
+    assert gh.parse_wait("Wait 1 hour 5 min") == 3600 + 300
+    assert gh.parse_wait("Espera 2 días") == 2 * 86400
+    assert gh.parse_wait("30") == 30 * 60 # 没有单位按分钟
+    assert gh.parse_wait("") == 0 and gh.parse_wait(None) == 0
+
+def test_match_targets():
+    servers = [{"name": "666"}, {"name": "666-2"}, {"name": "web"}]
+    assert gh.match_targets(servers, "all") == servers
+    assert gh.match_targets(servers, "first") == servers[:1]
+    assert gh.match_targets(servers, "666*") == servers[:2]
+    assert gh.match_targets(servers, "web, 666") == [servers[0], servers[2]]
+    assert gh.match_targets(servers, "nope") == []
+
+def test_login_form_hidden_fields_and_meta_token():
+    page = """<meta name="csrf-token" content="tok&amp;1">
+<form class="search"><input name="q"></form>
+<form method="post" action="/login"><input type="hidden" name="next" value='/dashboard'>
+<input type="email" name="email"><input type=password name=password><input type="checkbox" name="remember"></form>"""
+    action, fields = gh.login_form(page)
+    assert action == "/login"
+    assert fields == {"next": "/dashboard", "remember": "on", "_token": "tok&1"}
+
+def test_login_form_missing():
+    assert gh.login_form("<form><input name='q'></form>") is None
+
+def test_split_on_block_boundaries():
+    blocks = [f"<b>server {i}</b>\n" + "x" * 300 for i in range(30)]
+    msg = "\n\n".join(blocks)
+    parts = split_message(msg, 1000)
+    assert all(len(p) <= 1000 for p in parts)
+    assert all(p.count("<b>") == p.count("</b>") for p in parts) # 不在标签中间切
+
+def test_chunks_pack_messages():
+    out = chunks(["a" * 400, "b" * 400, "c" * 400], 1000)
+    assert len(out) == 2 and all(len(c) <= 1000 for c in out)
+    assert out[0].startswith("a") and out[1] == "c" * 400
+
+def test_hard_cut_only_as_last_resort():
+    assert split_message("a" * 2500, 1000) == ["a" * 1000, "a" * 1000, "a" * 500]
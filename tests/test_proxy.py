@@ -0,0 +1,38 @@
+import pytest
+
+from gh_proxy import ProxyPool, proxy_host
+
+def pool(tmp_path, urls, strict="ip"):
+    p = ProxyPool(urls, str(tmp_path / "cache.json"), strict=strict)
+    probes = []
+    def check(url, force=False):
+        probes.append(url)
+        return {"ok": True, "ip": "203.0.113.9", "latency_ms": 5, "reason": ""}
+    p.check = check
+    return p, probes
+
+def test_single_unchecked_proxy_skips_probe(tmp_path):
+    p, probes = pool(tmp_path, ["socks5://gw.example.com:1080"])
+    assert p.pick() == "socks5://gw.example.com:1080"
+    assert probes == [] # 落地 IP 交给后台查询
+
+def test_strict_proxy_is_probed_before_login(tmp_path):
+    p, probes = pool(tmp_path, ["socks5://203.0.113.9:1080"])
+    assert p.pick() == "socks5://203.0.113.9:1080"
+    assert probes == ["socks5://203.0.113.9:1080"] # 要校验出口 IP (BLOCK_ERR)，只能先探测
+
+def test_several_candidates_are_ranked(tmp_path):
+    p, probes = pool(tmp_path, ["socks5://a.example.com:1080", "socks5://b.example.com:1080"])
+    p.pick()
+    assert sorted(probes) == ["socks5://a.example.com:1080", "socks5://b.example.com:1080"]
+
+def test_no_candidates_left(tmp_path):
+    p, _ = pool(tmp_path, ["socks5://gw.example.com:1080"], strict="0")
+    with pytest.raises(Exception, match="代理池已无可用代理"):
+        p.pick(exclude=["socks5://gw.example.com:1080"])
+
+def test_one_proxy_label_everywhere():
+    import greathost as gh
+    g = gh.GH("a@b.c", "pw"); g.proxy = "socks5://user:pw@h"
+    assert proxy_host(g.proxy) == "socks5://h:1080"
+    assert g.breaker_key.endswith("|socks5://h:1080") # 熔断 key、历史库、代理池日志同一个标签